@@ -0,0 +1,154 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: HEADLESS BENCHMARK OF THE DETECTION STAGES ON REPLAYED OR SYNTHETIC FRAMES (NO CAMERA OR PLC NEEDED)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import argparse                 # Command line options
+import json                     # Saving and comparing benchmark results
+import os                       # File paths
+import tempfile                 # Scratch directory for the output files
+import time                     # Time module
+import cv2                      # OpenCV library for image and video processing
+import numpy as np              # For numerical operations
+from gear_detection import detect_gear, default_settings, GearTracker  # Contour logic of one frame
+from gear_output import draw_result, save_coordinates_csv  # Result image and CSV file
+from gear_replay import load_recording, read_bag, synthetic_replay  # Offline frame sources
+from twincat_transfer import build_sum_write_requests, max_points  # Packing of the coordinate upload
+
+## Parameters
+stage_order = ["preprocessing", "coarse_search", "contours", "gear_checks", "start_point",
+               "polar_conversion", "output"]  # Order of the stages in the report
+
+
+## Timer that adds the time since the previous mark to the named stage and keeps the sum per frame (gear_metrics.StageTimer keeps every mark)
+class FrameStageTimer:
+    def __init__(self):
+        self.totals = {}                                                        # Stage name -> list of durations in seconds, one per frame
+        self.frame_totals = {}
+        self.last = 0.0
+
+    ## Function to start timing a new frame
+    def start(self):
+        self.frame_totals = {}
+        self.last = time.perf_counter()
+
+    ## Function to end the current stage
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.frame_totals[stage] = self.frame_totals.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    ## Function to store the stage times of the current frame; time since the last mark is added to `rest_stage`
+    def finish(self, rest_stage="gear_checks"):
+        self.mark(rest_stage)
+        for stage, duration in self.frame_totals.items():
+            self.totals.setdefault(stage, []).append(duration)
+
+
+## Function to run the output stage without the PLC: result image, CSV file, PNG encoding and packing of the upload
+def run_output_stage(color_image, gear, output_directory):
+    result_image = draw_result(color_image.copy(), gear)
+    save_coordinates_csv(gear["distances_mm"], gear["angles_deg"], os.path.join(output_directory, "coordinates.csv"))
+    cv2.imencode(".png", result_image)
+    count = min(len(gear["distances_mm"]), max_points)
+    build_sum_write_requests((0x4040, 0), (0x4040, 40000), (0x4040, 80000),
+                             gear["distances_mm"], gear["angles_deg"], count, 2048)
+
+
+## Function to get the frame source from the command line options
+def open_source(args):
+    if args.source == "synthetic":
+        return synthetic_replay(args.frames, args.teeth, args.diameter, args.depth, args.width, args.height, args.noise)
+    if args.source.endswith(".bag"):
+        return read_bag(args.source, args.frames)
+    return load_recording(args.source)
+
+
+## Function to run the detection on `frames` frames of the source and time every stage
+def run_benchmark(source, frames, settings, output_directory, warmup=5):
+    tracker = GearTracker(settings) if settings["detection_mode"] == "roi" else None
+    timer = FrameStageTimer()
+    messages = {}
+    frame_times = []
+    for index in range(warmup + frames):
+        frameset = source.wait_for_frames()
+        color_image = np.asanyarray(frameset.get_color_frame().get_data())
+        depth_frame = frameset.get_depth_frame()
+
+        start = time.perf_counter()
+        timer.start()
+        if tracker is not None:
+            message, gear = tracker.detect(color_image, depth_frame, timer)
+        else:
+            message, gear = detect_gear(color_image, depth_frame, settings, timer)
+        if gear is not None:
+            timer.mark("polar_conversion")
+            run_output_stage(color_image, gear, output_directory)
+            timer.mark("output")
+        if index < warmup:                                                      # Caches and lazy initialisation are not measured
+            continue
+        timer.finish()
+        frame_times.append(time.perf_counter() - start)
+        messages[message] = messages.get(message, 0) + 1
+
+    stages = {stage: {"mean_ms": float(np.mean(times)) * 1000, "p95_ms": float(np.percentile(times, 95)) * 1000}
+              for stage, times in timer.totals.items()}
+    return {
+        "frames": frames,
+        "full_frame_fallbacks": tracker.fallbacks if tracker is not None else 0,  # Full-frame searches after a failed coarse search
+        "fps": frames / sum(frame_times),
+        "frame_mean_ms": float(np.mean(frame_times)) * 1000,
+        "frame_p95_ms": float(np.percentile(frame_times, 95)) * 1000,
+        "stages": stages,
+        "messages": messages,
+    }
+
+
+## Function to print the benchmark results, with the change against an older result file when given
+def print_results(results, baseline=None):
+    print(f"\n{results['frames']} frames: {results['fps']:.1f} fps, "
+          f"frame mean {results['frame_mean_ms']:.2f} ms, p95 {results['frame_p95_ms']:.2f} ms, "
+          f"{results.get('full_frame_fallbacks', 0)} full-frame fallbacks")
+    print(f"  {'stage':22s} {'mean ms':>9s} {'p95 ms':>9s}" + (f" {'change':>9s}" if baseline else ""))
+    for stage in sorted(results["stages"], key=lambda name: stage_order.index(name) if name in stage_order else len(stage_order)):
+        times = results["stages"][stage]
+        line = f"  {stage:22s} {times['mean_ms']:9.3f} {times['p95_ms']:9.3f}"
+        if baseline and stage in baseline["stages"] and baseline["stages"][stage]["mean_ms"] > 0:
+            line += f" {(times['mean_ms'] / baseline['stages'][stage]['mean_ms'] - 1) * 100:+8.1f}%"
+        print(line)
+    for message, count in results["messages"].items():
+        print(f"  {count:5d}x {message}")
+
+
+## Main function to run this script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the time of every detection stage on recorded or synthetic frames.")
+    parser.add_argument("source", nargs="?", default="synthetic", help="'synthetic', a recording (.npz) or a RealSense bag file (.bag)")
+    parser.add_argument("--frames", type=int, default=200, help="Number of measured frames")
+    parser.add_argument("--mode", choices=["roi", "full"], default=default_settings["detection_mode"], help="Detection mode")
+    parser.add_argument("--resample", type=int, default=default_settings["resample_points"], help="Points of the resampled path (0 = off)")
+    parser.add_argument("--teeth", type=int, default=24, help="Synthetic gear: number of teeth")
+    parser.add_argument("--diameter", type=float, default=100, help="Synthetic gear: diameter in mm")
+    parser.add_argument("--depth", type=float, default=0.25, help="Synthetic gear: distance to the camera in m")
+    parser.add_argument("--noise", type=float, default=3.0, help="Synthetic gear: standard deviation of the image noise")
+    parser.add_argument("--width", type=int, default=640, help="Synthetic gear: image width")
+    parser.add_argument("--height", type=int, default=480, help="Synthetic gear: image height")
+    parser.add_argument("--json", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="Compare against the results in this JSON file")
+    args = parser.parse_args()
+
+    settings = dict(default_settings, detection_mode=args.mode, resample_points=args.resample)
+    source = open_source(args)
+    with tempfile.TemporaryDirectory() as output_directory:
+        results = run_benchmark(source, args.frames, settings, output_directory)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,523 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: LOCAL FAKE TWINCAT ADS ENDPOINT FOR MEASURING AND TESTING THE PLC COMMUNICATION WITHOUT A RUNTIME
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import argparse                 # Command line options for the benchmark
+import ctypes                   # Sizes of the PLC data types
+import random                  # Random moments of the simulated start pulses
+import re                       # Parsing array element names
+import select                   # Waiting for data on the client sockets
+import socket                   # Waiting for the fake PLC to listen
+import struct                   # Packing and unpacking ADS frames
+import threading                # Lock around the PLC memory
+import time                     # Time module
+from datetime import datetime   # Time stamps of the notifications
+import numpy as np              # For numerical operations
+import pyads                    # Library for communication with the TwinCAT PLC
+from pyads import constants
+from pyads.filetimes import dt_to_filetime
+from pyads.testserver import AdsTestServer
+from pyads.testserver.testserver import AdsClientConnection
+from pyads.testserver.handler import AbstractHandler, AmsResponseData
+
+## Parameters
+fake_ams_net_id = "127.0.0.1.1.1"      # AMS Net ID of the fake PLC
+fake_ip_address = "127.0.0.1"          # IP address the fake PLC listens on
+fake_port = 851                        # PLC runtime port
+memory_index_group = 0x4040            # Index group of the PLC memory area
+notification_cycle_s = 0.01            # Delay of the initial value of a new device notification (one PLC task cycle)
+
+## Variables of the Main program that the gear detection uses: name -> (ADS type, PLC type, size in bytes)
+gear_plc_variables = {
+    "Main.startprocess": (constants.ADST_BIT, "BOOL", 1),
+    "Main.restart": (constants.ADST_BIT, "BOOL", 1),
+    "Main.coordinatesreceived": (constants.ADST_BIT, "BOOL", 1),
+    "Main.status_message": (constants.ADST_STRING, "STRING(80)", 81),
+    "Main.next_move": (constants.ADST_STRING, "STRING(80)", 81),
+    "Main.x_coords": (constants.ADST_REAL32, "ARRAY [1..9999] OF REAL", 4 * 9999),
+    "Main.y_coords": (constants.ADST_REAL32, "ARRAY [1..9999] OF REAL", 4 * 9999),
+    "Main.coord_count": (constants.ADST_INT16, "INT", 2),
+    "Main.recipe_id": (constants.ADST_INT32, "DINT", 4),
+    "Main.rotation_offset_deg": (constants.ADST_REAL32, "REAL", 4),
+    "Main.metrics_cycle_p95_ms": (constants.ADST_REAL32, "REAL", 4),
+    "Main.metrics_detection_p95_ms": (constants.ADST_REAL32, "REAL", 4),
+    "Main.metrics_upload_p95_ms": (constants.ADST_REAL32, "REAL", 4),
+    "Main.metrics_time_to_gear_p95_ms": (constants.ADST_REAL32, "REAL", 4),
+    "Main.metrics_gears_found": (constants.ADST_INT32, "DINT", 4),
+    "Main.metrics_timeouts": (constants.ADST_INT32, "DINT", 4),
+    "Main.metrics_frames_dropped": (constants.ADST_INT32, "DINT", 4),
+    "Main.metrics_no_contours": (constants.ADST_INT32, "DINT", 4),
+    "Main.metrics_not_circular": (constants.ADST_INT32, "DINT", 4),
+    "Main.metrics_depth_unavailable": (constants.ADST_INT32, "DINT", 4),
+}
+
+
+## Function to get the variables of a station that uses another prefix than "Main." (e.g. "Cell2.")
+def prefixed_variables(prefix, variables=gear_plc_variables):
+    return {prefix + name.split(".", 1)[1]: definition for name, definition in variables.items()}
+
+
+## ADS error codes returned by the fake PLC
+ADSERR_DEVICE_SRVNOTSUPP = 0x701
+ADSERR_DEVICE_INVALIDSIZE = 0x705
+ADSERR_DEVICE_SYMBOLNOTFOUND = 0x710
+ADSERR_DEVICE_INVALIDOFFSET = 0x703
+empty_data = struct.pack("<I", 0)      # Length field of an error reply to READ/READWRITE (and handle of a refused notification)
+
+
+## Request handler that keeps the PLC variables in one flat memory area, like the TwinCAT runtime does
+class FakePlcHandler(AbstractHandler):
+    def __init__(self, variables=gear_plc_variables, round_trip_delay=0.0):
+        self.round_trip_delay = round_trip_delay                                # Simulated network + PLC cycle delay per request
+        self.notifications_enabled = True                                       # False = refuse device notifications, like a PLC without them
+        self.lock = threading.Lock()
+        self.symbols = {}                                                       # name -> (offset, size, ADS type, PLC type)
+        self.handles = {}                                                       # handle -> (offset, size)
+        self.next_handle = 1
+        self.notifications = {}                                                 # notification handle -> (offset, size, connection, AMS addresses)
+        self.pending_notifications = []                                         # (handle, initial value), sent after the add-notification response
+        self.next_notification_handle = 1
+        offset = 0
+        for name, (ads_type, symbol_type, size) in variables.items():
+            self.symbols[name] = (offset, size, ads_type, symbol_type)
+            offset += size
+        self.symbol_version_offset = offset                                     # One byte after the variables: ADSIGRP_SYM_VERSION
+        self.memory = bytearray(offset + 1)
+        self.reset_counters()
+
+    ## Function to reset the request counters
+    def reset_counters(self):
+        self.request_count = 0
+        self.bytes_received = 0
+
+    ## Function to find the memory region of a variable or array element (e.g. "Main.x_coords[5]")
+    def resolve(self, name):
+        name = name.strip("\x00")
+        if name in self.symbols:
+            offset, size, _, _ = self.symbols[name]
+            return offset, size
+        match = re.fullmatch(r"(.+)\[(\d+)\]", name)
+        if match and match.group(1) in self.symbols:
+            offset, size, _, symbol_type = self.symbols[match.group(1)]
+            bounds = re.search(r"\[(-?\d+)\.\.(-?\d+)\]", symbol_type)
+            if bounds:
+                lower, upper = int(bounds.group(1)), int(bounds.group(2))
+                element_size = size // (upper - lower + 1)
+                index = int(match.group(2))
+                if lower <= index <= upper:
+                    return offset + (index - lower) * element_size, element_size
+        return None
+
+    ## Function to read a value from the fake PLC memory (used by the simulated PLC side)
+    def read_value(self, name, plc_datatype):
+        offset, size = self.resolve(name)
+        with self.lock:
+            data = bytes(self.memory[offset:offset + size])
+        if plc_datatype == pyads.PLCTYPE_STRING:
+            return data.split(b"\x00")[0].decode("utf-8")
+        return plc_datatype.from_buffer_copy(data[:ctypes.sizeof(plc_datatype)]).value
+
+    ## Function to read an array of REAL values from the fake PLC memory
+    def read_reals(self, name, count):
+        offset, _ = self.resolve(name)
+        with self.lock:
+            return np.frombuffer(bytes(self.memory[offset:offset + 4 * count]), dtype="<f4")
+
+    ## Function to write a value into the fake PLC memory (used by the simulated PLC side)
+    def write_value(self, name, value, plc_datatype):
+        offset, size = self.resolve(name)
+        if plc_datatype == pyads.PLCTYPE_STRING:
+            data = value.encode("utf-8") + b"\x00"
+        else:
+            data = bytes(plc_datatype(value))
+        with self.lock:
+            self.write_memory(offset, data[:size])
+
+    ## Function to write raw bytes into the memory area and notify changed variables (lock must be held)
+    def write_memory(self, offset, data):
+        watched = [(handle, bytes(self.memory[start:start + size])) for handle, (start, size, *_) in self.notifications.items()
+                   if start < offset + len(data) and offset < start + size]
+        self.memory[offset:offset + len(data)] = data
+        for handle, old_value in watched:
+            start, size = self.notifications[handle][:2]
+            if self.memory[start:start + size] != old_value:                    # Only on change, like ADSTRANS_SERVERONCHA
+                self.send_notification(handle)
+
+    ## Function to push the current value (or `value`) of a notification to its client as an ADS device notification frame
+    def send_notification(self, handle, value=None):
+        start, size, connection, client_net_id, client_port, plc_net_id, plc_port = self.notifications[handle]
+        sample = struct.pack("<II", handle, size) + (bytes(self.memory[start:start + size]) if value is None else value)
+        stamp = struct.pack("<QI", dt_to_filetime(datetime.now().astimezone()), 1) + sample
+        data = struct.pack("<II", len(stamp) + 4, 1) + stamp
+        ams_header = (client_net_id + client_port + plc_net_id + plc_port
+                      + struct.pack("<HHIII", constants.ADSCOMMAND_DEVICENOTE, 0x0004, len(data), 0, 0) + data)
+        try:
+            connection.send(struct.pack("<HI", 0, len(ams_header)) + ams_header)
+        except OSError:
+            self.notifications.pop(handle, None)                                # Client is gone
+
+    ## Function to send the initial values of newly added notifications
+    def send_pending_notifications(self):
+        with self.lock:
+            for handle, value in self.pending_notifications:
+                if handle in self.notifications:
+                    self.send_notification(handle, value)
+            self.pending_notifications = []
+
+    ## Function to simulate a download: every variable moves by `shift` bytes, handles become invalid and the symbol version changes
+    def relocate_symbols(self, shift=64):
+        with self.lock:
+            old_memory = bytes(self.memory[:self.symbol_version_offset])
+            version = self.memory[self.symbol_version_offset]
+            self.symbols = {name: (offset + shift, size, ads_type, symbol_type)
+                            for name, (offset, size, ads_type, symbol_type) in self.symbols.items()}
+            self.handles.clear()
+            self.symbol_version_offset += shift
+            self.memory = bytearray(shift) + bytearray(old_memory) + bytearray([version])
+            self.notifications = {handle: (start + shift, *rest) for handle, (start, *rest) in self.notifications.items()}
+            self.write_memory(self.symbol_version_offset, bytes([(version + 1) % 256]))
+
+    ## Function to translate an index group/offset pair to a memory offset
+    def memory_offset(self, index_group, index_offset, length):
+        if index_group == constants.ADSIGRP_SYM_VERSION:
+            if length > 1:
+                return None, ADSERR_DEVICE_INVALIDSIZE
+            return self.symbol_version_offset, 0
+        if index_group == constants.ADSIGRP_SYM_VALBYHND:
+            if index_offset not in self.handles:
+                return None, ADSERR_DEVICE_SYMBOLNOTFOUND
+            offset, size = self.handles[index_offset]
+            if length > size:
+                return None, ADSERR_DEVICE_INVALIDSIZE
+            return offset, 0
+        if index_group == memory_index_group:
+            if index_offset + length > len(self.memory):
+                return None, ADSERR_DEVICE_INVALIDOFFSET
+            return index_offset, 0
+        return None, ADSERR_DEVICE_SRVNOTSUPP
+
+    ## Function to pack the symbol information for a name lookup
+    def symbol_info(self, name):
+        offset, size = self.resolve(name)
+        base_name = name.split("[")[0]
+        _, _, ads_type, symbol_type = self.symbols[base_name]
+        if base_name != name:
+            symbol_type = symbol_type.split(" OF ")[-1]
+        name_bytes = name.encode("utf-8")
+        type_bytes = symbol_type.encode("utf-8")
+        entry_length = 6 * 4 + 3 * 2 + len(name_bytes) + len(type_bytes) + 3
+        return (struct.pack("<IIIIIIHHH", entry_length, memory_index_group, offset, size, ads_type, 0,
+                            len(name_bytes), len(type_bytes), 0)
+                + name_bytes + b"\x00" + type_bytes + b"\x00" + b"\x00")
+
+    ## Function to handle a READ request
+    def handle_read(self, data):
+        index_group, index_offset, length = struct.unpack("<III", data[:12])
+        offset, error = self.memory_offset(index_group, index_offset, length)
+        if error:
+            return error, empty_data                                            # The reply always carries the length field
+        value = bytes(self.memory[offset:offset + length])
+        return 0, struct.pack("<I", len(value)) + value
+
+    ## Function to handle a WRITE request
+    def handle_write(self, data):
+        index_group, index_offset, length = struct.unpack("<III", data[:12])
+        value = data[12:12 + length]
+        if index_group == constants.ADSIGRP_SYM_RELEASEHND:
+            self.handles.pop(struct.unpack("<I", value)[0], None)
+            return 0, b""
+        offset, error = self.memory_offset(index_group, index_offset, length)
+        if error:
+            return error, b""
+        self.write_memory(offset, value)
+        return 0, b""
+
+    ## Function to handle a READWRITE request (handles, symbol info and sum commands)
+    def handle_read_write(self, data):
+        index_group, index_offset, read_length, write_length = struct.unpack("<IIII", data[:16])
+        write_data = data[16:16 + write_length]
+
+        if index_group in (constants.ADSIGRP_SYM_HNDBYNAME, constants.ADSIGRP_SYM_INFOBYNAMEEX):
+            name = write_data.decode("utf-8").strip("\x00")
+            region = self.resolve(name)
+            if region is None:
+                return ADSERR_DEVICE_SYMBOLNOTFOUND, empty_data
+            if index_group == constants.ADSIGRP_SYM_INFOBYNAMEEX:
+                value = self.symbol_info(name)
+            else:
+                handle = self.next_handle
+                self.next_handle += 1
+                self.handles[handle] = region
+                value = struct.pack("<I", handle)
+
+        elif index_group == constants.ADSIGRP_SUMUP_WRITE:
+            headers = [struct.unpack("<III", write_data[i:i + 12]) for i in range(0, index_offset * 12, 12)]
+            position = index_offset * 12
+            results = []
+            for group, sub_offset, length in headers:
+                offset, error = self.memory_offset(group, sub_offset, length)
+                if not error:
+                    self.write_memory(offset, write_data[position:position + length])
+                results.append(error)
+                position += length
+            value = struct.pack(f"<{len(results)}I", *results)
+
+        elif index_group == constants.ADSIGRP_SUMUP_READ:
+            headers = [struct.unpack("<III", write_data[i:i + 12]) for i in range(0, index_offset * 12, 12)]
+            results, values = [], b""
+            for group, sub_offset, length in headers:
+                offset, error = self.memory_offset(group, sub_offset, length)
+                results.append(error)
+                values += bytes(length) if error else bytes(self.memory[offset:offset + length])
+            value = struct.pack(f"<{len(results)}I", *results) + values
+
+        else:
+            return ADSERR_DEVICE_SRVNOTSUPP, empty_data
+
+        return 0, struct.pack("<I", len(value)) + value
+
+    ## Function to handle an ADD_DEVICE_NOTIFICATION request
+    def handle_add_notification(self, request, connection):
+        index_group, index_offset, length = struct.unpack("<III", request.ams_header.data[:12])
+        offset, error = self.memory_offset(index_group, index_offset, length)
+        if error or connection is None or not self.notifications_enabled:
+            return error or ADSERR_DEVICE_SRVNOTSUPP, empty_data
+        handle = self.next_notification_handle
+        self.next_notification_handle += 1
+        header = request.ams_header
+        self.notifications[handle] = (offset, length, connection, header.source_net_id, header.source_port,
+                                      header.target_net_id, header.target_port)
+        self.pending_notifications.append((handle, bytes(self.memory[offset:offset + length])))  # Value at the time of the subscription
+        return 0, struct.pack("<I", handle)
+
+    ## Function to answer one AMS request, called by the test server for every round trip
+    def handle_request(self, request, connection=None):
+        command_id = struct.unpack("<H", request.ams_header.command_id)[0]
+        state = struct.pack("<H", struct.unpack("<H", request.ams_header.state_flags)[0] | 0x0001)
+        data = request.ams_header.data
+
+        if self.round_trip_delay:
+            time.sleep(self.round_trip_delay)
+
+        with self.lock:
+            self.request_count += 1
+            self.bytes_received += len(data)
+
+            if command_id == constants.ADSCOMMAND_READ:
+                error, content = self.handle_read(data)
+            elif command_id == constants.ADSCOMMAND_WRITE:
+                error, content = self.handle_write(data)
+            elif command_id == constants.ADSCOMMAND_READWRITE:
+                error, content = self.handle_read_write(data)
+            elif command_id == constants.ADSCOMMAND_ADDDEVICENOTE:
+                error, content = self.handle_add_notification(request, connection)
+            elif command_id == constants.ADSCOMMAND_DELDEVICENOTE:
+                self.notifications.pop(struct.unpack("<I", data[:4])[0], None)
+                error, content = 0, b""
+            elif command_id == constants.ADSCOMMAND_READSTATE:
+                error, content = 0, struct.pack("<HH", constants.ADSSTATE_RUN, 0)
+            elif command_id == constants.ADSCOMMAND_READDEVICEINFO:
+                error, content = 0, b"\x03\x01\x00\x00" + b"FakeTwinCAT".ljust(16, b"\x00")
+            else:
+                error, content = ADSERR_DEVICE_SRVNOTSUPP, b""
+
+        return AmsResponseData(state, request.ams_header.error_code, struct.pack("<I", error) + content)
+
+
+## Client connection that reads complete AMS/TCP frames (the pyads test server reads at most 4096 bytes per request)
+class FakePlcConnection(AdsClientConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.send_lock = threading.Lock()                                       # Responses and notifications come from different threads
+
+    ## Function to send one complete frame to the client
+    def send(self, frame):
+        with self.send_lock:
+            self.client.sendall(frame)
+
+    ## Function to read exactly `length` bytes from the client socket
+    def receive(self, length):
+        data = b""
+        while len(data) < length:
+            part = self.client.recv(length - len(data))
+            if not part:
+                return None
+            data += part
+        return data
+
+    ## Function to answer requests until the client disconnects
+    def run(self):
+        self._run = True
+        while self._run:
+            ready, _, _ = select.select([self.client], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                tcp_header = self.receive(6)                                    # Reserved (2 bytes) + frame length (4 bytes)
+                frame = tcp_header and self.receive(struct.unpack("<I", tcp_header[2:6])[0])
+            except OSError:
+                frame = None
+            if not frame:
+                self.client.close()
+                self._run = False
+                continue
+            request_packet = self.construct_request(tcp_header + frame)
+            response = self.handler.handle_request(request_packet, self)
+            try:
+                self.send(self.construct_response(response, request_packet))
+            except OSError:
+                self._run = False
+                continue
+            if self.handler.pending_notifications:                               # Initial values come one PLC cycle later, like in TwinCAT,
+                threading.Timer(notification_cycle_s, self.handler.send_pending_notifications).start()  # when the client knows the handle
+
+
+## Fake PLC server that hands every new client to a FakePlcConnection
+class FakePlcServer(AdsTestServer):
+    def run(self):
+        self._run = True
+        self.server.listen(5)
+        while self._run:
+            ready, _, _ = select.select([self.server], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                client, address = self.server.accept()
+            except OSError:
+                continue
+            client_thread = FakePlcConnection(handler=self.handler, client=client, address=address, server=self)
+            client_thread.daemon = True
+            client_thread.start()
+            self.clients.append(client_thread)
+
+
+## Function to start a fake PLC in a background thread; returns the server and its handler
+def start_fake_plc(ip_address=fake_ip_address, variables=gear_plc_variables, round_trip_delay=0.0):
+    handler = FakePlcHandler(variables, round_trip_delay)
+    server = FakePlcServer(handler=handler, ip_address=ip_address, logging=False)
+    server.start()
+    deadline = time.time() + 5
+    while time.time() < deadline:                                               # Wait until the server thread is listening
+        try:
+            socket.create_connection((ip_address, server.port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.01)
+    return server, handler
+
+
+## Function to open a pyads connection to the fake PLC
+def connect_to_fake_plc(ams_net_id=fake_ams_net_id, ip_address=fake_ip_address, port=fake_port):
+    plc = pyads.Connection(ams_net_id, port, ip_address)                       # The IP address adds the ADS route on Linux
+    plc.open()
+    return plc
+
+
+## Function to compare the per-point upload with the bulk upload against the fake PLC
+def benchmark_coordinate_transfer(points, round_trip_delay):
+    from twincat_transfer import send_coordinates_to_twincat, send_coordinates_to_twincat_bulk
+
+    angles = np.linspace(0, 360, points, endpoint=False)
+    distances = 60 + 5 * np.sin(np.radians(angles) * 24)                         # Gear-like radial profile
+    x_coords, y_coords = distances.tolist(), angles.tolist()
+
+    server, handler = start_fake_plc(round_trip_delay=round_trip_delay)
+    plc = connect_to_fake_plc()
+    try:
+        results = {}
+        for mode in ("per_point", "bulk"):
+            handler.reset_counters()
+            start = time.perf_counter()
+            if mode == "per_point":
+                send_coordinates_to_twincat(x_coords, y_coords, fake_ams_net_id, fake_port)
+            else:
+                send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache={})
+            elapsed = time.perf_counter() - start
+
+            count = min(points, 9999)
+            received_x = handler.read_reals("Main.x_coords", count)
+            received_y = handler.read_reals("Main.y_coords", count)
+            valid = (np.allclose(received_x, np.float32(x_coords[:count])) and np.allclose(received_y, np.float32(y_coords[:count])))
+            if mode == "bulk":
+                valid = valid and handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) == count
+            results[mode] = (handler.request_count, handler.bytes_received, elapsed, valid)
+
+            # Clear the PLC arrays so the next mode has to write everything again
+            with handler.lock:
+                handler.memory[:] = bytes(len(handler.memory))
+    finally:
+        plc.close()
+        server.close()
+
+    print(f"\nCoordinate transfer of {points} points (simulated round trip delay {round_trip_delay * 1000:.1f} ms):")
+    for mode, (round_trips, bytes_sent, elapsed, valid) in results.items():
+        print(f"  {mode:10s} {round_trips:6d} ADS round trips  {bytes_sent / 1024:8.1f} kB  {elapsed * 1000:9.1f} ms  data {'OK' if valid else 'MISMATCH'}")
+    return results
+
+
+## Function to measure how fast a start pulse is noticed in polling and in notification mode
+def benchmark_start_pulse(pulses, round_trip_delay):
+    from twincat_handshake import PlcHandshake
+
+    server, handler = start_fake_plc(round_trip_delay=round_trip_delay)
+    plc = connect_to_fake_plc()
+    random.seed(1)
+    results = {}
+    try:
+        for mode in ("polling", "notification"):
+            handshake = PlcHandshake(plc, mode)
+            handshake.open()
+            handler.reset_counters()
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(pulses):
+                pulse_times = []
+
+                # Simulated PLC: give the start pulse at a random moment
+                def give_start_pulse():
+                    time.sleep(random.uniform(0.05, 0.25))
+                    pulse_times.append(time.perf_counter())
+                    handler.write_value("Main.startprocess", True, pyads.PLCTYPE_BOOL)
+
+                plc_side = threading.Thread(target=give_start_pulse)
+                plc_side.start()
+                noticed = handshake.wait_for_start(timeout=5)
+                noticed_time = time.perf_counter()
+                plc_side.join()
+                latencies.append(noticed_time - pulse_times[0] if noticed else float("nan"))
+                handshake.acknowledge_start()
+            elapsed = time.perf_counter() - start
+            handshake.close()
+            results[mode] = (np.array(latencies), handler.request_count / elapsed)
+    finally:
+        plc.close()
+        server.close()
+
+    print(f"\nStart pulse reaction latency over {pulses} pulses (simulated round trip delay {round_trip_delay * 1000:.1f} ms):")
+    for mode, (latencies, request_rate) in results.items():
+        print(f"  {mode:12s} mean {np.mean(latencies) * 1000:7.2f} ms  max {np.max(latencies) * 1000:7.2f} ms  "
+              f"ADS traffic {request_rate:6.1f} requests/s")
+    return results
+
+
+## Main function to run this script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the PLC communication against a local fake TwinCAT PLC.")
+    parser.add_argument("test", nargs="?", default="transfer", choices=["transfer", "start-pulse"],
+                        help="transfer: coordinate upload per point vs bulk, start-pulse: polling vs notification latency")
+    parser.add_argument("--points", type=int, default=2000, help="Number of contour points to send")
+    parser.add_argument("--pulses", type=int, default=20, help="Number of start pulses to give")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Simulated delay per ADS round trip in ms")
+    args = parser.parse_args()
+
+    if args.test == "transfer":
+        results = benchmark_coordinate_transfer(args.points, args.delay_ms / 1000)
+        if not all(valid for _, _, _, valid in results.values()):
+            raise SystemExit("Coordinate transfer check failed.")
+    else:
+        results = benchmark_start_pulse(args.pulses, args.delay_ms / 1000)
+        if any(np.isnan(latencies).any() for latencies, _ in results.values()):
+            raise SystemExit("Start pulse was not noticed within 5 s.")
@@ -0,0 +1,196 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: DETECTING THE GEAR IN ONE CAMERA FRAME AND CONVERTING ITS CONTOUR TO THE DEBURRING PATH
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import cv2                      # OpenCV library for image and video processing
+import numpy as np              # For numerical operations
+from gear_geometry import reorder_contour, contour_to_polar, resample_polar_profile  # Vectorized contour to distance/angle conversion
+
+## Default detection settings (the main script passes its own parameters)
+default_settings = {
+    "lower_threshold": 25,                          # Lower threshold for edge detection (Canny edge)
+    "upper_threshold": 150,                         # Upper threshold for edge detection (Canny edge)
+    "pixels_per_mm_at_reference_distance": 2.45,    # Number of pixels per millimeter at a specific reference distance
+    "reference_distance_m": 0.25,                   # Reference distance in meters
+    "min_diameter_mm": 40,                          # minimum size of the gear in mm
+    "max_diameter_mm": 180,                         # maximum size of the gear in mm
+    "resample_points": 0,                           # Number of points on a uniform angular grid (0 = every contour point)
+    "detection_mode": "roi",                        # "roi": coarse-to-fine search with tracking, "full": full-frame edge detection every frame
+    "coarse_scale": 0.25,                           # Scale of the image for the coarse search of the gear
+    "roi_padding": 0.15,                            # Extra margin around the gear circle, relative to its radius
+    "min_contour_points": 50,                       # Contours with fewer points are noise and are skipped
+    "full_frame_fallback_interval": 10,             # Frames with a failed coarse search between two full-frame searches (roi mode)
+}
+
+
+## Function to find the gear in a color image; returns (message, gear) where gear is None when no gear was found
+## `timer` is optional: an object with a mark(stage) method that is called at the end of every stage (see gear_metrics.StageTimer and benchmark_detection.FrameStageTimer)
+def detect_gear(color_image, depth_frame, settings=default_settings, timer=None):
+    # Preprocess the color image
+    gray = cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY)                        # Convert the color image to grayscale
+    blurred = cv2.GaussianBlur(gray, (1, 1), 0)                                 # Apply a Gaussian blur to reduce noise (blurring image)
+    edges = cv2.Canny(blurred, settings["lower_threshold"], settings["upper_threshold"])  # Perform Canny edge detection (detecting the edges)
+    if timer:
+        timer.mark("preprocessing")
+
+    # Detect contours in the edge-detected image
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)  # Extract external contours
+    largest_contour = find_largest_contour(contours, settings["min_contour_points"])
+    if timer:
+        timer.mark("contours")
+    if largest_contour is None:
+        return "No contours found", None
+    return check_gear_contour(largest_contour, depth_frame, settings, timer)
+
+
+## Function to find the largest contour, skipping small noise contours before the area is calculated
+def find_largest_contour(contours, min_points):
+    candidates = [contour for contour in contours if len(contour) >= min_points]
+    if not candidates:
+        return None
+    return max(candidates, key=cv2.contourArea)                                 # Find the largest contour
+
+
+## Function to check whether a contour is a gear of the right size and convert it to the deburring path
+def check_gear_contour(contour, depth_frame, settings=default_settings, timer=None):
+    (x, y), radius = cv2.minEnclosingCircle(contour)                            # Center and radius of the minimum enclosing circle
+
+    circle_area = np.pi * (radius ** 2)                                         # Calculate the area of the minimum enclosing circle
+    contour_area = cv2.contourArea(contour)                                     # Calculate the area of the contour
+    if not 0.7 < contour_area / circle_area < 1.0:                              # Check if the contour is circular
+        return "Object not circular", None
+
+    depth_at_center = depth_frame.get_distance(int(x), int(y))                  # Get the depth (distance)
+    if depth_at_center <= 0:
+        return "Depth not available at the center of the object", None
+
+    pixels_per_mm = settings["pixels_per_mm_at_reference_distance"] * (settings["reference_distance_m"] / depth_at_center)  # Adjust pixels per mm
+    diameter_mm = (2 * radius) / pixels_per_mm                                  # Calculate the diameter of the gear in millimeters
+    if not settings["min_diameter_mm"] <= diameter_mm <= settings["max_diameter_mm"]:  # Check if the diameter is within the acceptable range
+        return (f"Object: diameter ({diameter_mm:.2f} mm) is not between {settings['min_diameter_mm']} mm "
+                f"and {settings['max_diameter_mm']} mm."), None
+    if timer:
+        timer.mark("gear_checks")
+
+    ## Start the contour at the point closest to the vertical line through the center
+    reordered_contour, _ = reorder_contour(contour, x)
+    if timer:
+        timer.mark("start_point")
+
+    ## Convert the contour to distances in mm and angles in degrees
+    distances_mm, angles_deg = contour_to_polar(reordered_contour, x, y, pixels_per_mm)
+    if settings["resample_points"]:                                             # 0 = keep every contour point
+        distances_mm, angles_deg = resample_polar_profile(distances_mm, angles_deg, settings["resample_points"])
+    if timer:
+        timer.mark("polar_conversion")
+    gear = {
+        "center": (x, y),
+        "radius": radius,
+        "depth_m": depth_at_center,
+        "pixels_per_mm": pixels_per_mm,
+        "diameter_mm": diameter_mm,
+        "contour": reordered_contour,
+        "distances_mm": distances_mm,
+        "angles_deg": angles_deg,
+    }
+    return "Gear found", gear
+
+
+## Tracker that finds the gear with a cheap downscaled search and only runs full-resolution edge detection in a ROI around it
+class GearTracker:
+    def __init__(self, settings=default_settings):
+        self.settings = settings
+        self.roi = None                                                         # (x0, y0, x1, y1) of the last gear, None = search the full frame
+        self.fallback_interval = settings["full_frame_fallback_interval"]
+        self.frames_since_fallback = self.fallback_interval                     # The first failed coarse search falls back at once
+        self.fallbacks = 0                                                      # Number of full-frame searches (for the benchmark)
+
+    ## Function to forget the tracked gear
+    def reset(self):
+        self.roi = None
+        self.frames_since_fallback = self.fallback_interval
+
+    ## Function to find the gear; the ROI of the previous gear is tried first, then a full-frame coarse search, then the full-frame detection
+    ## (at once when the gear is bigger than the coarse ROI, otherwise once every `full_frame_fallback_interval` frames)
+    def detect(self, color_image, depth_frame, timer=None):
+        gray = cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY)                    # Convert the color image to grayscale
+        if timer:
+            timer.mark("preprocessing")
+        if self.roi is not None:
+            message, gear = self.detect_in_roi(gray, depth_frame, self.roi, timer)
+            if gear is not None:
+                return message, gear
+            self.roi = None                                                     # Lost the gear: fall back to a full-frame search
+
+        roi = self.find_coarse_roi(gray)
+        if timer:
+            timer.mark("coarse_search")
+        if roi is None:
+            return "No contours found", None
+        message, gear = self.detect_in_roi(gray, depth_frame, roi, timer)
+        if gear is not None:
+            return message, gear
+
+        # The coarse search can pick the wrong object or a piece of the gear edge: search the full frame at full resolution.
+        # A full-frame search costs as much as the "full" mode, so without a gear in view it only runs every few frames
+        self.frames_since_fallback += 1
+        if message != "Object extends beyond the search region" and self.frames_since_fallback < self.fallback_interval:
+            return message, gear
+        self.frames_since_fallback = 0
+        self.fallbacks += 1
+        message, gear = detect_gear(color_image, depth_frame, self.settings, timer)
+        if gear is not None:
+            x, y = gear["center"]
+            self.roi = self.padded_roi(x, y, gear["radius"], gray.shape)        # Track the gear from the next frame on
+        return message, gear
+
+    ## Function to find the enclosing circle of the largest object in a downscaled image; returns a padded ROI
+    def find_coarse_roi(self, gray):
+        scale = self.settings["coarse_scale"]
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)  # Averaging keeps the gear edge
+        edges = cv2.Canny(small, self.settings["lower_threshold"], self.settings["upper_threshold"])
+        edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))  # Join the pieces of a gear edge broken up by fine teeth
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_length = self.settings["min_contour_points"] * scale                # Contour length in pixels of the smallest accepted contour
+        candidates = [contour for contour in contours if cv2.arcLength(contour, True) >= min_length]
+        if not candidates:
+            return None
+        circles = [cv2.minEnclosingCircle(contour) for contour in candidates]
+        (x, y), radius = max(circles, key=lambda circle: circle[1])              # Largest object; a broken edge has no reliable area
+        return self.padded_roi(x / scale, y / scale, (radius + 2) / scale, gray.shape)
+
+    ## Function to make a ROI around a circle, with padding, clipped to the image
+    def padded_roi(self, x, y, radius, shape):
+        half_size = radius * (1 + self.settings["roi_padding"]) + 4
+        x0, y0 = max(0, int(x - half_size)), max(0, int(y - half_size))
+        x1, y1 = min(shape[1], int(x + half_size) + 1), min(shape[0], int(y + half_size) + 1)
+        return x0, y0, x1, y1
+
+    ## Function to run the full-resolution detection inside the ROI only
+    def detect_in_roi(self, gray, depth_frame, roi, timer=None):
+        x0, y0, x1, y1 = roi
+        blurred = cv2.GaussianBlur(gray[y0:y1, x0:x1], (1, 1), 0)              # Apply a Gaussian blur to reduce noise (blurring image)
+        edges = cv2.Canny(blurred, self.settings["lower_threshold"], self.settings["upper_threshold"])
+        if timer:
+            timer.mark("preprocessing")
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=(x0, y0))  # Contours in full-frame coordinates
+        largest_contour = find_largest_contour(contours, self.settings["min_contour_points"])
+        if timer:
+            timer.mark("contours")
+        if largest_contour is None:
+            return "No contours found", None
+
+        # A contour that runs into the ROI border (not the image border) is cut off: the gear is bigger than the ROI
+        bx, by, bw, bh = cv2.boundingRect(largest_contour)
+        if ((bx <= x0 and x0 > 0) or (by <= y0 and y0 > 0) or
+                (bx + bw >= x1 and x1 < gray.shape[1]) or (by + bh >= y1 and y1 < gray.shape[0])):
+            return "Object extends beyond the search region", None
+
+        message, gear = check_gear_contour(largest_contour, depth_frame, self.settings, timer)
+        if gear is not None:
+            x, y = gear["center"]
+            self.roi = self.padded_roi(x, y, gear["radius"], gray.shape)        # Carry the ROI over to the next frame
+        return message, gear
@@ -0,0 +1,46 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: CONVERTING THE GEAR CONTOUR TO DISTANCE/ANGLE COORDINATES (VECTORIZED, OPTIONAL FIXED-SIZE RESAMPLING)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import numpy as np              # For numerical operations
+
+
+## Function to reorder the contour so it starts at the point closest to the vertical line through the center
+def reorder_contour(contour, center_x):
+    points = contour.reshape(-1, 2)                                             # (N, 1, 2) OpenCV contour -> (N, 2) points
+    start_index = int(np.argmin(np.abs(points[:, 0] - int(center_x))))         # First point closest to the vertical line
+    reordered_contour = np.roll(contour, -start_index, axis=0)                  # Start the contour at the start point
+    return reordered_contour, start_index
+
+
+## Function to convert a (reordered) contour to distances in mm and angles in degrees around the center
+def contour_to_polar(contour, center_x, center_y, pixels_per_mm):
+    points = contour.reshape(-1, 2).astype(np.float64)
+    mm_x = (points[:, 0] - center_x) / pixels_per_mm                           # X offsets from the center in millimeters
+    mm_y = (points[:, 1] - center_y) / pixels_per_mm                           # Y offsets from the center in millimeters
+
+    distances = np.hypot(mm_x, mm_y)                                            # Distance of every point from the center
+    angles = (np.degrees(np.arctan2(mm_y, mm_x)) + 90) % 360                    # Angle of every point, 0 degrees at the top
+
+    ## Shift the contour to 0 degrees if the first point is near 180 degrees
+    if 170 <= angles[0] <= 190:
+        angles = (angles + 180) % 360
+    return distances, angles
+
+
+## Function to resample the distance profile to a fixed number of points on a uniform angular grid
+def resample_polar_profile(distances, angles, number_of_points):
+    unwrapped = np.degrees(np.unwrap(np.radians(angles)))                       # Continuous angle along the contour
+    direction = 1 if unwrapped[-1] >= unwrapped[0] else -1                     # Direction in which the contour runs around the center
+    travelled = np.maximum.accumulate(direction * (unwrapped - unwrapped[0]))   # Angle travelled from the start point, never decreasing
+    travelled = np.minimum(np.append(travelled, 360.0), 360.0)                  # Close the loop back to the start point
+    closed_distances = np.append(distances, distances[0])
+
+    grid = np.arange(number_of_points) * (360.0 / number_of_points)             # Uniform angular steps from the start point
+    resampled_distances = np.interp(grid, travelled, closed_distances)          # Linear interpolation between neighbouring contour points (sub-pixel)
+    resampled_angles = (angles[0] + direction * grid) % 360
+    return resampled_distances, resampled_angles
+
@@ -0,0 +1,223 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: HOT-PATH INSTRUMENTATION (ROLLING LATENCY HISTOGRAMS AND COUNTERS) WITH EXPORT TO A METRICS FILE AND THE PLC
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import collections              # Rolling windows of latencies
+import os                       # Replacing the metrics file in one step
+import struct                   # Packing the PLC values
+import threading                # Lock and export thread
+import time                     # Time module
+import numpy as np              # For numerical operations
+import pyads                    # ADS error codes
+from twincat_transfer import get_symbol_location, clear_symbol_cache, send_sum_write  # Packed writes over the open PLC connection
+
+## Parameters
+default_window = 500            # Number of latest samples per latency histogram
+default_metrics_filename = "gear_metrics.txt"  # Text file with the latest metrics
+symbol_not_found = 0x710        # ADS error of a variable that the PLC program does not have
+
+## Counter names of the messages of the detection stage (the diameter message contains numbers, so it is matched by its start)
+detection_message_counters = {
+    "No contours found": "no_contours",
+    "Object not circular": "not_circular",
+    "Depth not available at the center of the object": "depth_unavailable",
+    "Object extends beyond the search region": "beyond_search_region",
+    "Object: diameter": "diameter_out_of_range",
+}
+
+## Numeric PLC variables for the HMI: PLC variable -> (metric, "<f" for REAL or "<i" for DINT)
+plc_metric_variables = {
+    "Main.metrics_cycle_p95_ms": ("cycle.p95_ms", "<f"),
+    "Main.metrics_detection_p95_ms": ("detection.p95_ms", "<f"),
+    "Main.metrics_upload_p95_ms": ("io.coordinate_upload.p95_ms", "<f"),
+    "Main.metrics_time_to_gear_p95_ms": ("time_to_gear_found.p95_ms", "<f"),
+    "Main.metrics_gears_found": ("gears_found", "<i"),
+    "Main.metrics_timeouts": ("timeouts", "<i"),
+    "Main.metrics_frames_dropped": ("frames_dropped", "<i"),
+    "Main.metrics_no_contours": ("no_contours", "<i"),
+    "Main.metrics_not_circular": ("not_circular", "<i"),
+    "Main.metrics_depth_unavailable": ("depth_unavailable", "<i"),
+}
+
+
+## Function to get the counter name of a message of the detection stage
+def detection_counter_name(message):
+    for start, name in detection_message_counters.items():
+        if message.startswith(start):
+            return name
+    return "other_rejections"
+
+
+## Rolling latency histograms and counters; all methods return at once when disabled
+class Metrics:
+    def __init__(self, enabled=True, window=default_window):
+        self.enabled = enabled
+        self.window = window
+        self.lock = threading.Lock()
+        self.latencies = {}                                                     # name -> deque of the latest durations in seconds
+        self.counters = {}                                                      # name -> count since the start of the program
+        self.started = time.time()
+
+    ## Function to get the start time of a measurement; None when disabled
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    ## Function to store the time since `start` (from start(), or a time.monotonic() time with clock=time.monotonic)
+    def record(self, name, start, clock=time.perf_counter):
+        if start is None or not self.enabled:
+            return
+        self.add_latency(name, clock() - start)
+
+    ## Function to store a duration in seconds
+    def add_latency(self, name, seconds):
+        if not self.enabled:
+            return
+        samples = self.latencies.get(name)
+        if samples is None:
+            with self.lock:
+                samples = self.latencies.setdefault(name, collections.deque(maxlen=self.window))
+        samples.append(seconds)                                                 # deque.append is thread-safe
+
+    ## Function to add to a counter
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    ## Function to wrap a function so every call is timed; returns the function itself when disabled
+    def timed(self, name, function):
+        if not self.enabled:
+            return function
+
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add_latency(name, time.perf_counter() - start)
+        timed_function.__name__ = getattr(function, "__name__", name)
+        return timed_function
+
+    ## Function to get a timer for the stages of the detection (see detect_gear); None when disabled
+    def stage_timer(self, prefix):
+        return StageTimer(self, prefix) if self.enabled else None
+
+    ## Function to get all metrics as a flat dict: "<name>.p50_ms", "<name>.p95_ms", "<name>.max_ms", "<name>.count" and the counters
+    def snapshot(self):
+        with self.lock:
+            latencies = {name: list(samples) for name, samples in self.latencies.items()}
+            snapshot = dict(self.counters)
+        for name, samples in sorted(latencies.items()):
+            if not samples:
+                continue
+            p50, p95 = np.percentile(samples, [50, 95]) * 1000
+            snapshot[f"{name}.p50_ms"] = float(p50)
+            snapshot[f"{name}.p95_ms"] = float(p95)
+            snapshot[f"{name}.max_ms"] = max(samples) * 1000
+            snapshot[f"{name}.count"] = len(samples)
+        snapshot["uptime_s"] = time.time() - self.started
+        return snapshot
+
+
+## Shared disabled instance, default of the stages that are not instrumented
+disabled_metrics = Metrics(enabled=False)
+
+
+## Timer with the mark(stage) interface of the detection functions; every stage is stored as "<prefix>.<stage>"
+class StageTimer:
+    def __init__(self, metrics, prefix):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    ## Function to start timing a new frame
+    def start(self):
+        self.last = time.perf_counter()
+
+    ## Function to end the current stage
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.metrics.add_latency(f"{self.prefix}.{stage}", now - self.last)
+        self.last = now
+
+
+## Function to write the metrics to a text file (one "name value" per line); the old file is replaced in one step
+def write_metrics_file(snapshot, filename=default_metrics_filename):
+    lines = [f"# Gear detection metrics {time.strftime('%Y-%m-%d %H:%M:%S')}"]
+    for name, value in sorted(snapshot.items()):
+        lines.append(f"{name} {value:.3f}" if isinstance(value, float) else f"{name} {value}")
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    os.replace(temporary_filename, filename)                                    # The HMI never sees a half-written file
+
+
+## Function to write the metrics to the numeric PLC variables in one ADS sum command
+def send_metrics_to_twincat(snapshot, plc, symbol_cache=None, variables=plc_metric_variables):
+    try:
+        if plc and plc.is_open:                                                 # Check if the PLC connection is open
+            requests = []
+            for variable_name, (metric, value_format) in variables.items():
+                value = snapshot.get(metric, 0)
+                value = int(value) if value_format == "<i" else float(value)
+                index_group, index_offset = get_symbol_location(plc, variable_name, symbol_cache)
+                requests.append((index_group, index_offset, struct.pack(value_format, value)))
+            send_sum_write(plc, requests)
+        else:
+            print("Unable to connect to the PLC.")
+    except Exception as e:
+        print(f"Error while sending metrics: {e}")
+        clear_symbol_cache(symbol_cache)                                        # A variable may have moved (online change or download)
+
+
+## Export stage: writes the metrics file and queues the PLC export on the I/O worker every `interval` seconds
+## The PLC export has its own symbol cache, so its errors never clear the locations of the coordinate upload
+class MetricsExporter(threading.Thread):
+    def __init__(self, metrics, interval=5.0, filename=default_metrics_filename, io_worker=None, plc=None,
+                 plc_variables=plc_metric_variables):
+        super().__init__(daemon=True)
+        self.metrics = metrics
+        self.interval = interval
+        self.filename = filename
+        self.io_worker = io_worker                                              # PLC writes go through the I/O worker, in order with the others
+        self.plc = plc                                                          # None = no PLC export
+        self.symbol_cache = {}                                                  # Locations of the metrics variables only
+        self.plc_variables = plc_variables                                      # PLC variable -> (metric, format), see plc_metric_variables
+        self.stop_event = threading.Event()
+
+    ## Function to export the current metrics once
+    def export(self):
+        snapshot = self.metrics.snapshot()
+        try:
+            write_metrics_file(snapshot, self.filename)
+        except OSError as e:
+            print(f"Error while writing the metrics file: {e}")
+        if self.io_worker is not None and self.plc is not None:
+            self.io_worker.submit(self.send_to_plc, snapshot)
+
+    ## Function to write the metrics to the PLC (I/O worker); the PLC export is turned off when the PLC program has no metrics variables
+    def send_to_plc(self, snapshot):
+        if self.plc is None:
+            return
+        try:
+            for variable_name in self.plc_variables:
+                get_symbol_location(self.plc, variable_name, self.symbol_cache)
+        except pyads.ADSError as e:
+            if e.err_code == symbol_not_found:
+                print(f"Warning: the PLC program has no metrics variables ({e}), metrics are only written to {self.filename}.")
+                self.plc = None                                                 # Not tried again
+                return
+        send_metrics_to_twincat(snapshot, self.plc, self.symbol_cache, self.plc_variables)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.export()
+        self.export()                                                           # Last values when the program stops
+
+    ## Function to stop the thread
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,43 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: RESULT OUTPUT OF A FOUND GEAR (ANNOTATED IMAGE AND CSV FILE)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import cv2                      # OpenCV library for image and video processing
+import csv                      # Reading and writing data to CSV files
+
+
+## Function to draw the contour and the measurements in the result image
+def draw_result(color_image, gear):
+    x, y = gear["center"]
+    first_point_x, first_point_y = gear["contour"][0][0]                        # Get the coordinates of the first point
+
+    ## Draw the contour and comments in the final image
+    cv2.drawContours(color_image, [gear["contour"]], -1, (0, 255, 0), 2)        # Draw the contour in green
+    cv2.putText(color_image, "X-axis", (int(x) + 10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)                            # Label X-axis
+    cv2.putText(color_image, "Y-axis", (color_image.shape[1] - 100, int(y) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)    # Label Y-axis
+
+    ## Mark the first point
+    cv2.circle(color_image, (int(first_point_x), int(first_point_y)), 3, (0, 0, 255), -1)                                               # Draw a red circle at the first point
+    cv2.putText(color_image, "First Point", (int(first_point_x) + 10, int(first_point_y)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)  # Label the first point
+
+    # Display the first coordinates and angle on the image
+    if len(gear["distances_mm"]):
+        cv2.putText(color_image, f"First Coordinates: {gear['distances_mm'][0]:.2f} mm, Angle: {gear['angles_deg'][0]:.2f} degrees",
+                    (25, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+
+    # Display the calculated diameter of the gear on the image
+    cv2.putText(color_image, f"Diameter: {gear['diameter_mm']:.2f} mm",
+                (25, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (255, 255, 255), 2)
+    return color_image
+
+
+## Function to write the coordinates to a CSV file
+def save_coordinates_csv(x_coords_mm, y_coords_deg, filename="contour_coordinates_mm_&_degrees.csv"):
+    with open(filename, mode="w", newline="") as file:
+        writer = csv.writer(file)                                               # Open the CSV file
+        writer.writerow(["Distance (mm)", "Angle (degrees)"])                   # Write distance and degrees to csv header
+        for distance, angle in zip(x_coords_mm, y_coords_deg):                  # Write the distance and angle for each point
+            writer.writerow([distance, angle])
@@ -0,0 +1,127 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: BACKGROUND PERSISTENCE OF THE RESULTS (COMPACT PER-PART ARCHIVE WITH SIZE LIMITS, OPTIONAL CSV/PNG EXPORT)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import collections              # Archive files, oldest first
+import glob                     # Existing archive files
+import os                       # File paths
+import queue                    # Bounded queue of results
+import threading                # Event of a job
+import time                     # Time module
+import cv2                      # OpenCV library for image and video processing
+import numpy as np              # For numerical operations
+from gear_output import draw_result, save_coordinates_csv  # Result image and CSV file
+from gear_pipeline import IoWorker  # Worker thread that runs jobs in order
+from gear_metrics import disabled_metrics  # Latency histograms and counters
+
+## Parameters
+default_archive_directory = "gear_archive"   # Directory of the per-part archive
+default_max_files = 1000        # Maximum number of parts in the archive, the oldest parts are removed first
+default_max_bytes = 100 * 1024 * 1024        # Maximum size of the archive in bytes
+default_max_pending = 8         # Results waiting to be written; more results are dropped instead of blocking the cycle
+
+
+## Archive of one compact .npz file per part; the oldest parts are removed when a limit is reached
+class ResultArchive:
+    def __init__(self, directory=default_archive_directory, max_files=default_max_files, max_bytes=default_max_bytes):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.files = collections.deque()                                        # (path, size), oldest first
+        for path in sorted(glob.glob(os.path.join(directory, "part_*.npz"))):   # The file names sort by time
+            self.files.append((path, os.path.getsize(path)))
+        self.total_bytes = sum(size for _, size in self.files)
+        self.sequence = 0                                                       # Makes names of parts in the same millisecond unique
+
+    ## Function to write one part; returns the path of the file
+    def add(self, gear, timestamp, recipe_id=None, rotation_offset_deg=0.0):
+        self.sequence = (self.sequence + 1) % 1000
+        name = time.strftime("part_%Y%m%d_%H%M%S", time.localtime(timestamp)) + f"_{int(timestamp * 1000) % 1000:03d}_{self.sequence:03d}.npz"
+        path = os.path.join(self.directory, name)
+        x, y = gear["center"]
+        np.savez(path,
+                 distances_mm=np.asarray(gear["distances_mm"], dtype=np.float32),
+                 angles_deg=np.asarray(gear["angles_deg"], dtype=np.float32),
+                 contour=gear["contour"].reshape(-1, 2).astype(np.int16),       # Pixel coordinates fit in 16 bits
+                 diameter_mm=gear["diameter_mm"],
+                 depth_m=gear["depth_m"],
+                 pixels_per_mm=gear["pixels_per_mm"],
+                 center=np.array([x, y]),
+                 radius=gear["radius"],
+                 timestamp=timestamp,
+                 recipe_id=-1 if recipe_id is None else recipe_id,              # -1 = full path uploaded
+                 rotation_offset_deg=rotation_offset_deg)
+        self.files.append((path, os.path.getsize(path)))
+        self.total_bytes += self.files[-1][1]
+        self.prune()
+        return path
+
+    ## Function to remove the oldest parts until the archive is within its limits (the newest part is always kept)
+    def prune(self):
+        while len(self.files) > 1 and (len(self.files) > self.max_files or self.total_bytes > self.max_bytes):
+            path, size = self.files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error while removing {path}: {e}")
+
+
+## Function to read one part of the archive; returns a dict with the same keys as the gear (plus timestamp, recipe_id, rotation_offset_deg)
+def load_part(path):
+    with np.load(path) as data:
+        part = {key: data[key] for key in data.files}
+    for key in ("diameter_mm", "depth_m", "pixels_per_mm", "radius", "timestamp", "rotation_offset_deg"):
+        part[key] = float(part[key])
+    part["recipe_id"] = int(part["recipe_id"])
+    part["center"] = tuple(part["center"])
+    part["contour"] = part["contour"].astype(np.int32).reshape(-1, 1, 2)       # OpenCV contour layout
+    return part
+
+
+## Persistence stage: writes the results in the background; when it falls behind, new results are dropped instead of waiting
+class PersistenceWorker(IoWorker):
+    def __init__(self, archive=None, csv_filename=None, png_filename=None, max_pending=default_max_pending, metrics=disabled_metrics):
+        super().__init__()
+        self.jobs = queue.Queue(max_pending)
+        self.archive = archive                                                  # ResultArchive, None = no archive
+        self.csv_filename = csv_filename                                        # CSV export of the newest part, None = off
+        self.png_filename = png_filename                                        # Result image of the newest part, None = off
+        self.metrics = metrics
+
+    ## Function to queue a job without waiting; returns an event that is set when the job is done, None when the job was dropped
+    def submit(self, function, *args, **kwargs):
+        done = threading.Event()
+        try:
+            self.jobs.put_nowait((function, args, kwargs, done))
+        except queue.Full:
+            print("Persistence is behind, result not saved.")
+            self.metrics.count("persistence_dropped")
+            return None
+        return done
+
+    ## Function to queue the result of one part (color image, gear and the PLC recipe, if any)
+    def save_result(self, color_image, gear, recipe_id=None, rotation_offset_deg=0.0):
+        return self.submit(self.write_result, color_image, gear, time.time(), recipe_id, rotation_offset_deg)
+
+    ## Function to write the result of one part (runs in the worker thread)
+    def write_result(self, color_image, gear, timestamp, recipe_id, rotation_offset_deg):
+        start = self.metrics.start()
+        if self.archive is not None:
+            self.archive.add(gear, timestamp, recipe_id, rotation_offset_deg)
+        if self.csv_filename:
+            save_coordinates_csv(gear["distances_mm"], gear["angles_deg"], self.csv_filename)
+        if self.png_filename:
+            cv2.imwrite(self.png_filename, draw_result(color_image, gear))    # Save the result image to a file
+        self.metrics.record("persistence.write", start)
+
+    ## Function to finish the queued jobs and stop the thread
+    def stop(self):
+        done = threading.Event()
+        self.jobs.put((None, (), {}, done))                                     # Waits for a free place, the stop request is never dropped
+        done.wait()
+
@@ -0,0 +1,185 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: PIPELINED CAPTURE / DETECTION / PLC-I/O THREADS WITH LATEST-FRAME-ONLY HAND-OVER
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import queue                    # FIFO of PLC and file jobs
+import threading                # Worker threads
+import time                     # Time module
+import numpy as np              # For numerical operations
+from gear_detection import detect_gear, default_settings, GearTracker  # Contour logic of one frame
+from gear_metrics import disabled_metrics, detection_counter_name  # Latency histograms and counters
+
+
+## Slot that only keeps the newest item; older items are overwritten instead of queued
+class LatestSlot:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.sequence = 0                                                       # Number of items put so far
+
+    ## Function to replace the item in the slot
+    def put(self, item):
+        with self.condition:
+            self.item = item
+            self.sequence += 1
+            self.condition.notify_all()
+
+    ## Function to wait for an item newer than `sequence`; returns (sequence, item) or (sequence, None) on timeout
+    def get_newer(self, sequence, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > sequence, timeout):
+                return sequence, None
+            return self.sequence, self.item
+
+
+## Capture stage: keeps reading the camera and puts only the newest color/depth pair in the slot
+class CaptureThread(threading.Thread):
+    def __init__(self, pipeline, slot, metrics=disabled_metrics):
+        super().__init__(daemon=True)
+        self.pipeline = pipeline                                                # RealSense pipeline (or a replay source with wait_for_frames)
+        self.slot = slot
+        self.metrics = metrics
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            start = self.metrics.start()
+            try:
+                frames = self.pipeline.wait_for_frames()                        # Wait for new frames from the Camera pipeline
+            except RuntimeError as e:
+                print(f"Error while reading frames: {e}")
+                self.metrics.count("frame_errors")
+                continue
+            color_frame = frames.get_color_frame()                              # Extract the color frame
+            depth_frame = frames.get_depth_frame()                              # Extract the depth frame
+            if not color_frame or not depth_frame:                              # Check if valid frames were received
+                print("No frames received. Retrying...")
+                self.metrics.count("frame_errors")
+                continue
+            color_image = np.asanyarray(color_frame.get_data())                 # Convert the color frame to a NumPy array
+            self.metrics.record("frame_wait", start)
+            self.slot.put((time.monotonic(), color_image, depth_frame))
+
+    ## Function to stop the thread after the current frame
+    def stop(self):
+        self.stop_event.set()
+
+
+## Detection stage: runs the contour logic on the newest frame while a search cycle is active
+class DetectionWorker(threading.Thread):
+    def __init__(self, slot, settings=default_settings, metrics=disabled_metrics):
+        super().__init__(daemon=True)
+        self.slot = slot
+        self.settings = settings
+        self.metrics = metrics
+        self.timer = metrics.stage_timer("detection")                           # Time of every detection stage, None when disabled
+        self.tracker = GearTracker(settings) if settings.get("detection_mode") == "roi" else None  # Coarse-to-fine search with tracking
+        self.condition = threading.Condition()
+        self.cycle = 0                                                          # Number of the current search cycle
+        self.active = False                                                     # True while the gear is being searched
+        self.cycle_start = 0.0                                                  # Frames older than this are not used
+        self.result = None                                                      # (color image, gear) of the current cycle
+        self.stop_event = threading.Event()
+
+    ## Function to start searching for a gear in frames captured from now on
+    def start_cycle(self):
+        with self.condition:
+            self.cycle += 1
+            self.active = True
+            self.cycle_start = time.monotonic()
+            self.result = None
+            self.condition.notify_all()                                         # Wake up the worker
+
+    ## Function to stop the current search (new start pulse or timeout); a result that is still being computed is dropped
+    def cancel(self):
+        with self.condition:
+            self.active = False
+            self.result = None
+
+    ## Function to wait for the gear of the current cycle; returns (color image, gear) or None
+    def wait_result(self, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.result is not None, timeout)
+            result, self.result = self.result, None
+            return result
+
+    def run(self):
+        sequence = 0
+        last_cycle = 0                                                          # Cycle of the previous detected frame
+        while not self.stop_event.is_set():
+            with self.condition:
+                if not self.condition.wait_for(lambda: self.active, 0.1):
+                    continue
+                cycle, cycle_start = self.cycle, self.cycle_start
+
+            previous_sequence = sequence
+            sequence, frame = self.slot.get_newer(sequence, 0.1)
+            if frame is None:
+                continue
+            timestamp, color_image, depth_frame = frame
+            if timestamp < cycle_start:                                         # Frame was taken before the start pulse
+                continue
+            if last_cycle == cycle and sequence - previous_sequence > 1:        # Frames overwritten while the previous one was detected
+                self.metrics.count("frames_dropped", sequence - previous_sequence - 1)
+            last_cycle = cycle
+
+            start = self.metrics.start()
+            if self.timer:
+                self.timer.start()
+            if self.tracker is not None:
+                message, gear = self.tracker.detect(color_image, depth_frame, self.timer)
+            else:
+                message, gear = detect_gear(color_image, depth_frame, self.settings, self.timer)
+            self.metrics.record("detection", start)
+            if gear is None:
+                print(message)
+                self.metrics.count(detection_counter_name(message))
+                continue
+
+            with self.condition:
+                if self.active and self.cycle == cycle:                         # Not cancelled in the meantime
+                    self.result = (color_image.copy(), gear)
+                    self.active = False
+                    self.condition.notify_all()
+
+    ## Function to stop the thread
+    def stop(self):
+        self.stop_event.set()
+
+
+## I/O stage: executes PLC writes and file writes one after the other, in the order they were submitted
+class IoWorker(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.jobs = queue.Queue()
+
+    ## Function to queue a job; returns an event that is set when the job is done
+    def submit(self, function, *args, **kwargs):
+        done = threading.Event()
+        self.jobs.put((function, args, kwargs, done))
+        return done
+
+    ## Function to queue a job and wait until it (and everything before it) is done; returns the result of the job
+    def call(self, function, *args, **kwargs):
+        result = []
+        self.submit(lambda: result.append(function(*args, **kwargs))).wait()
+        return result[0] if result else None
+
+    def run(self):
+        while True:
+            function, args, kwargs, done = self.jobs.get()
+            if function is None:                                                # Stop request
+                done.set()
+                break
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                print(f"Error in I/O job {getattr(function, '__name__', function)}: {e}")
+            done.set()
+
+    ## Function to finish the queued jobs and stop the thread
+    def stop(self):
+        self.submit(None).wait()
@@ -0,0 +1,201 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: CACHE OF KNOWN GEAR PROFILES (ROTATION-INVARIANT SIGNATURE, FFT CROSS-CORRELATION FOR THE ROTATION OFFSET)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import collections              # LRU order of the cached gears
+import os                       # File paths
+import threading                # Lock of the cache and the saver thread
+import numpy as np              # For numerical operations
+
+## Parameters
+profile_points = 360            # Samples of the radial profile on a uniform angular grid (1 degree)
+signature_harmonics = 64        # Harmonics of the radial profile used in the signature
+min_teeth = 3                   # Lower harmonics are shape errors (off-center, ellipse), not teeth
+default_cache_size = 32         # Number of gear types kept in the cache
+default_diameter_tolerance_mm = 1.5  # Maximum diameter difference of the same gear type
+default_signature_tolerance = 0.1    # Maximum relative difference of the FFT magnitudes of the same gear type
+
+
+## Function to sample the radial profile (distance per angle) on a uniform angular grid, 0 degrees first
+def radial_profile(distances_mm, angles_deg, number_of_points=profile_points):
+    grid = np.arange(number_of_points) * (360.0 / number_of_points)
+    return np.interp(grid, np.asarray(angles_deg, dtype=np.float64) % 360, distances_mm, period=360)  # Sorts the contour angles itself
+
+
+## Function to get the rotation-invariant signature of a radial profile: (diameter in mm, tooth count, normalised FFT magnitudes)
+def profile_signature(profile, diameter_mm):
+    spectrum = np.abs(np.fft.rfft(profile))[:signature_harmonics + 1] / len(profile)  # Rotating the gear only changes the phases
+    teeth = int(np.argmax(spectrum[min_teeth:])) + min_teeth                    # Strongest harmonic = number of teeth
+    magnitudes = spectrum[1:] / max(spectrum[0], 1e-9)                          # Relative to the mean radius
+    return diameter_mm, teeth, magnitudes
+
+
+## Function to find the rotation of `profile` against `reference_profile` in degrees by FFT cross-correlation
+## The result is only unique up to one tooth pitch (360 / teeth), which gives the same deburring path
+def rotation_offset(profile, reference_profile):
+    correlation = np.fft.irfft(np.fft.rfft(profile - profile.mean()) * np.conj(np.fft.rfft(reference_profile - reference_profile.mean())),
+                               len(profile))
+    shift = int(np.argmax(correlation))
+    # Parabolic interpolation between the neighbouring samples for a sub-degree offset
+    left, center, right = correlation[shift - 1], correlation[shift], correlation[(shift + 1) % len(profile)]
+    denominator = left - 2 * center + right
+    fraction = 0.5 * (left - right) / denominator if denominator else 0.0
+    return ((shift + fraction) * 360.0 / len(profile)) % 360
+
+
+## LRU cache of known gear types; every entry has a recipe ID for the PLC and the reference profile
+## The recipes live in the PLC program, so the cache is cleared when the symbol version of the PLC changes (see plc_version_changed)
+class GearProfileCache:
+    def __init__(self, max_entries=default_cache_size, filename=None,
+                 diameter_tolerance_mm=default_diameter_tolerance_mm, signature_tolerance=default_signature_tolerance):
+        self.max_entries = max_entries
+        self.filename = filename                                                # .npz file of the cache, None = memory only
+        self.diameter_tolerance_mm = diameter_tolerance_mm
+        self.signature_tolerance = signature_tolerance
+        self.entries = collections.OrderedDict()                                # recipe ID -> entry, least recently used first
+        self.lock = threading.Lock()
+        self.next_recipe_id = 1
+        self.plc_version = -1                                                   # Symbol version of the PLC that has the recipes, -1 = unknown
+        self.changed = False                                                    # New gear types or a new LRU order since the last save
+        if filename and os.path.exists(filename):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    ## Function to find the gear type of a gear; returns (recipe ID, rotation offset in degrees, profile, signature), recipe ID None when unknown
+    def lookup(self, gear):
+        profile = radial_profile(gear["distances_mm"], gear["angles_deg"])
+        signature = profile_signature(profile, gear["diameter_mm"])
+        diameter_mm, teeth, magnitudes = signature
+        best_id, best_difference = None, self.signature_tolerance
+        with self.lock:
+            for recipe_id, entry in self.entries.items():
+                if entry["teeth"] != teeth or abs(entry["diameter_mm"] - diameter_mm) > self.diameter_tolerance_mm:
+                    continue
+                difference = np.linalg.norm(magnitudes - entry["magnitudes"]) / max(np.linalg.norm(entry["magnitudes"]), 1e-9)
+                if difference < best_difference:
+                    best_id, best_difference = recipe_id, difference
+            if best_id is None:
+                return None, 0.0, profile, signature
+            if next(reversed(self.entries)) != best_id:
+                self.entries.move_to_end(best_id)                               # Most recently used
+                self.changed = True
+            reference_profile = self.entries[best_id]["profile"]
+        return best_id, rotation_offset(profile, reference_profile), profile, signature
+
+    ## Function to add a new gear type; the least recently used type is removed when the cache is full; returns the recipe ID
+    def add(self, gear, profile=None, signature=None):
+        if profile is None or signature is None:
+            profile = radial_profile(gear["distances_mm"], gear["angles_deg"])
+            signature = profile_signature(profile, gear["diameter_mm"])
+        diameter_mm, teeth, magnitudes = signature
+        entry = {
+            "diameter_mm": float(diameter_mm),
+            "teeth": int(teeth),
+            "magnitudes": magnitudes,
+            "profile": profile,
+        }
+        with self.lock:
+            recipe_id = self.next_recipe_id
+            self.next_recipe_id += 1
+            self.entries[recipe_id] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)                                # Remove the least recently used gear type
+            self.changed = True
+        return recipe_id
+
+    ## Function to forget one gear type (e.g. when the PLC did not take its recipe)
+    def remove(self, recipe_id):
+        with self.lock:
+            if self.entries.pop(recipe_id, None) is not None:
+                self.changed = True
+
+    ## Function to forget all gear types (the recipe IDs are not reused)
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.changed = True
+
+    ## Function to tell the cache the symbol version of the PLC; a new version (download of the PLC program) clears the cache
+    ## Also called with the first version after the start, so recipes from the cache file are dropped when the PLC changed meanwhile
+    def plc_version_changed(self, version):
+        if self.plc_version not in (-1, version) and len(self.entries):
+            print(f"PLC program changed (symbol version {self.plc_version} -> {version}), the {len(self.entries)} known gear types are cleared.")
+            self.clear()
+        if self.plc_version != version:
+            self.plc_version = version
+            self.changed = True
+
+    ## Function to write the cache to its file (in LRU order)
+    def save(self):
+        if not self.filename:
+            return
+        with self.lock:
+            arrays = {"recipe_ids": np.array(list(self.entries), dtype=np.int64), "next_recipe_id": self.next_recipe_id,
+                      "plc_version": self.plc_version}
+            for recipe_id, entry in self.entries.items():
+                for key, value in entry.items():
+                    arrays[f"{recipe_id}_{key}"] = value
+            self.changed = False                                                # Changes from now on are saved the next time
+        temporary_filename = self.filename + ".tmp.npz"
+        np.savez_compressed(temporary_filename, **arrays)
+        os.replace(temporary_filename, self.filename)                           # A crash never leaves a half-written cache
+
+    ## Function to read the cache from its file
+    def load(self):
+        try:
+            with np.load(self.filename) as data:
+                self.entries.clear()
+                for recipe_id in data["recipe_ids"].tolist():
+                    self.entries[recipe_id] = {
+                        "diameter_mm": float(data[f"{recipe_id}_diameter_mm"]),
+                        "teeth": int(data[f"{recipe_id}_teeth"]),
+                        "magnitudes": data[f"{recipe_id}_magnitudes"],
+                        "profile": data[f"{recipe_id}_profile"],
+                    }
+                self.next_recipe_id = int(data["next_recipe_id"])
+                self.plc_version = int(data["plc_version"]) if "plc_version" in data else -1
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error while reading the gear profile cache, starting empty: {e}")
+            self.entries.clear()
+
+
+## Saver stage: writes the cache file after a new gear type (on request) and the LRU order of the hits every `interval` seconds
+## The file is written on this thread, so a full result queue can never drop a new recipe from the cache file
+class ProfileCacheSaver(threading.Thread):
+    def __init__(self, cache, interval=5.0):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self.interval = interval
+        self.save_request = threading.Event()
+        self.stop_event = threading.Event()
+
+    ## Function to save the cache as soon as possible (e.g. after a new gear type)
+    def request_save(self):
+        self.save_request.set()
+
+    ## Function to save the cache if it changed since the last save
+    def save_changes(self):
+        if not self.cache.changed:
+            return
+        try:
+            self.cache.save()
+        except OSError as e:
+            self.cache.changed = True                                           # Try again next time
+            print(f"Error while saving the gear profile cache: {e}")
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.save_request.wait(self.interval)
+            self.save_request.clear()
+            self.save_changes()
+        self.save_changes()                                                     # Last LRU order when the program stops
+
+    ## Function to stop the thread (the cache is saved once more)
+    def stop(self):
+        self.stop_event.set()
+        self.save_request.set()
@@ -0,0 +1,206 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: OFFLINE FRAME SOURCES (RECORDED .NPZ / .BAG FILES AND SYNTHETIC GEARS) WITH THE SAME INTERFACE AS THE CAMERA PIPELINE
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import time                     # Time module
+import cv2                      # OpenCV library for image and video processing
+import numpy as np              # For numerical operations
+
+## Parameters
+default_depth_scale = 0.001     # Meters per depth unit (RealSense default: depth in millimeters)
+
+
+## Color frame of a replayed recording (same methods as a RealSense color frame)
+class ReplayColorFrame:
+    def __init__(self, image):
+        self.image = image
+
+    def get_data(self):
+        return self.image
+
+    def __bool__(self):
+        return self.image is not None
+
+
+## Depth frame of a replayed recording (same methods as a RealSense depth frame)
+class ReplayDepthFrame:
+    def __init__(self, depth, depth_scale=default_depth_scale):
+        self.depth = depth                                                      # Raw depth units, (height, width)
+        self.depth_scale = depth_scale
+
+    def get_data(self):
+        return self.depth
+
+    ## Function to get the distance in meters at a pixel
+    def get_distance(self, x, y):
+        return float(self.depth[y, x]) * self.depth_scale
+
+    def __bool__(self):
+        return self.depth is not None
+
+
+## Color/depth pair of a replayed recording (same methods as a RealSense frameset)
+class ReplayFrameSet:
+    def __init__(self, color_image, depth, depth_scale=default_depth_scale):
+        self.color_frame = ReplayColorFrame(color_image)
+        self.depth_frame = ReplayDepthFrame(depth, depth_scale)
+
+    def get_color_frame(self):
+        return self.color_frame
+
+    def get_depth_frame(self):
+        return self.depth_frame
+
+
+## Replay source of color images and depth arrays; can be used instead of the RealSense pipeline (e.g. in CaptureThread)
+class ArrayReplay:
+    def __init__(self, color_images, depth_images, depth_scale=default_depth_scale, fps=None, loop=True):
+        if len(color_images) != len(depth_images) or not len(color_images):
+            raise ValueError("Replay needs the same, non-zero number of color and depth images")
+        self.color_images = color_images
+        self.depth_images = depth_images
+        self.depth_scale = depth_scale
+        self.frame_interval = 1.0 / fps if fps else 0.0                         # 0 = as fast as possible
+        self.loop = loop
+        self.index = 0
+        self.next_frame_time = 0.0
+
+    def __len__(self):
+        return len(self.color_images)
+
+    ## Function to get the next frameset; waits for the frame rate of the recording when fps is set
+    def wait_for_frames(self, timeout_ms=5000):
+        if self.index >= len(self.color_images):
+            if not self.loop:
+                raise RuntimeError("End of the recording reached")
+            self.index = 0
+        if self.frame_interval:
+            delay = self.next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time = max(self.next_frame_time, time.monotonic()) + self.frame_interval
+        frames = ReplayFrameSet(self.color_images[self.index], self.depth_images[self.index], self.depth_scale)
+        self.index += 1
+        return frames
+
+    ## Functions so the replay can replace the pipeline in main()
+    def start(self, config=None):
+        self.index = 0
+
+    def stop(self):
+        pass
+
+
+## Function to save color images and depth arrays as one compressed recording
+def save_recording(filename, color_images, depth_images, depth_scale=default_depth_scale):
+    np.savez_compressed(filename, color=np.asarray(color_images), depth=np.asarray(depth_images), depth_scale=depth_scale)
+
+
+## Function to load a recording saved by save_recording
+def load_recording(filename, fps=None, loop=True):
+    with np.load(filename) as data:
+        return ArrayReplay(data["color"], data["depth"], float(data["depth_scale"]), fps, loop)
+
+
+## Replay source that streams a RealSense .bag recording frame by frame from the playback device (pyrealsense2 is only needed here)
+## Only the current frame is in memory, so long recordings can be replayed; frames come at recording speed when real_time is set
+class BagPlayback:
+    def __init__(self, filename, loop=True, real_time=True):
+        import pyrealsense2 as rs   # Accessing depth and RGB data from the recording
+
+        self.rs = rs
+        self.loop = loop
+        self.pipeline = rs.pipeline()
+        config = rs.config()
+        rs.config.enable_device_from_file(config, filename, repeat_playback=loop)
+        profile = self.pipeline.start(config)
+        profile.get_device().as_playback().set_real_time(real_time)            # False = read every frame, not at recording speed
+        self.depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+        self.align = rs.align(rs.stream.color)                                  # Same pixel grid for color and depth
+
+    ## Function to read the next color/depth pair; returns None at the end of the recording
+    def read(self, timeout_ms=1000):
+        while True:
+            success, frames = self.pipeline.try_wait_for_frames(timeout_ms)
+            if not success:                                                     # End of the recording
+                return None
+            frames = self.align.process(frames)
+            color_frame, depth_frame = frames.get_color_frame(), frames.get_depth_frame()
+            if not color_frame or not depth_frame:
+                continue
+            color_image = np.asanyarray(color_frame.get_data()).copy()
+            if color_frame.get_profile().format() == self.rs.format.rgb8:
+                color_image = cv2.cvtColor(color_image, cv2.COLOR_RGB2BGR)      # The detection expects BGR like the live camera
+            return ReplayFrameSet(color_image, np.asanyarray(depth_frame.get_data()).copy(), self.depth_scale)
+
+    ## Function to get the next frameset, like the camera pipeline
+    def wait_for_frames(self, timeout_ms=5000):
+        frames = self.read(timeout_ms)
+        if frames is None:
+            raise RuntimeError("End of the recording reached")
+        return frames
+
+    def stop(self):
+        self.pipeline.stop()
+
+
+## Function to read a RealSense .bag recording into memory (for repeatable benchmarks; use BagPlayback for long recordings)
+def read_bag(filename, max_frames=None, fps=None, loop=True):
+    playback = BagPlayback(filename, loop=False, real_time=False)
+    color_images, depth_images = [], []
+    try:
+        while max_frames is None or len(color_images) < max_frames:
+            frames = playback.read()
+            if frames is None:
+                break
+            color_images.append(frames.get_color_frame().get_data())
+            depth_images.append(frames.get_depth_frame().get_data())
+    finally:
+        playback.stop()
+    return ArrayReplay(color_images, depth_images, playback.depth_scale, fps, loop)
+
+
+## Function to draw a synthetic gear (dark background, bright gear) with a flat depth image at `depth_m`
+def synthetic_gear_frame(teeth=24, diameter_mm=100, depth_m=0.25, width=640, height=480, noise=3.0,
+                         center=None, rotation_deg=0.0, tooth_depth_mm=4.0,
+                         pixels_per_mm_at_reference_distance=2.45, reference_distance_m=0.25,
+                         depth_scale=default_depth_scale, seed=None):
+    pixels_per_mm = pixels_per_mm_at_reference_distance * (reference_distance_m / depth_m)  # Same model as the detection
+    outer_radius = diameter_mm / 2 * pixels_per_mm
+    root_radius = outer_radius - tooth_depth_mm * pixels_per_mm
+    cx, cy = center if center is not None else (width / 2, height / 2)
+
+    ## Teeth with flat tops and roots: the radius follows a clipped sine wave around the gear
+    angles = np.linspace(0, 2 * np.pi, 4000, endpoint=False)
+    wave = (np.clip(2 * np.sin(teeth * angles), -1, 1) + 1) / 2
+    radii = root_radius + (outer_radius - root_radius) * wave
+    angles = angles + np.radians(rotation_deg)
+    points = np.stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)], axis=1)
+
+    rng = np.random.default_rng(seed)
+    color_image = np.full((height, width, 3), 40, np.uint8)
+    cv2.fillPoly(color_image, [np.round(points * 16).astype(np.int32)], (200, 200, 200), cv2.LINE_AA, 4)  # Anti-aliased, sub-pixel edge like a camera image
+    if noise:
+        noisy = color_image.astype(np.float32) + rng.normal(0, noise, color_image.shape)
+        color_image = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    depth = np.full((height, width), int(round(depth_m / depth_scale)), np.uint16)
+    return color_image, depth
+
+
+## Function to make a replay of synthetic gears (slightly moving, like a gear on a conveyor that stops)
+def synthetic_replay(frames=100, teeth=24, diameter_mm=100, depth_m=0.25, width=640, height=480, noise=3.0,
+                     fps=None, loop=True, seed=0):
+    rng = np.random.default_rng(seed)
+    color_images, depth_images = [], []
+    for _ in range(frames):
+        center = (width / 2 + rng.uniform(-3, 3), height / 2 + rng.uniform(-3, 3))
+        color_image, depth = synthetic_gear_frame(teeth, diameter_mm, depth_m, width, height, noise,
+                                                  center=center, rotation_deg=rng.uniform(0, 360),
+                                                  seed=rng.integers(1 << 31))
+        color_images.append(color_image)
+        depth_images.append(depth)
+    return ArrayReplay(color_images, depth_images, default_depth_scale, fps, loop)
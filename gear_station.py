@@ -0,0 +1,372 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: ONE DEBURRING STATION (CAMERA + PLC): START PULSE, GEAR DETECTION, UPLOAD AND RESULT FILES, ALL SETTINGS IN ONE CONFIG
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import os                       # File paths of the station
+import threading                # Stop request of the station
+import time                     # Time module
+import pyads                    # Library for communication with the TwinCAT PLC
+from twincat_transfer import (send_coordinates_to_twincat, send_coordinates_to_twincat_bulk, send_recipe_to_twincat, watch_symbol_version,
+                              get_symbol_location)  # Upload of the contour coordinates or the recipe
+from twincat_handshake import PlcHandshake  # Start pulse, restart and completed handshake with the PLC
+from gear_detection import default_settings  # Default detection settings
+from gear_pipeline import LatestSlot, CaptureThread, DetectionWorker, IoWorker  # Capture, detection and PLC-I/O stages
+from gear_persistence import ResultArchive, PersistenceWorker  # Result archive, CSV and PNG files written in the background
+from gear_metrics import Metrics, MetricsExporter, plc_metric_variables  # Latency histograms and counters, exported to a file and the PLC
+from gear_profile_cache import GearProfileCache, ProfileCacheSaver  # Known gear types: recipe ID + rotation offset instead of the full path
+from gear_replay import load_recording, BagPlayback, synthetic_replay  # Replayed frames instead of the camera
+
+## Default configuration of a station (the station list and the single-station script only give what differs)
+default_station_config = {
+    "name": "station",                              # Name of the station in the status and the log
+    "camera_serial": None,                          # Serial number of the RealSense camera, None = first camera found
+    "replay": None,                                 # Replayed frames instead of the camera: "synthetic", a .npz recording or a .bag file
+    "camera_width": 640,                            # Resolution of the color and depth stream
+    "camera_height": 480,
+    "camera_fps": 30,                               # Frame rate of the camera (and of a synthetic or .npz replay; a .bag plays at recording speed)
+    "ams_net_id": "39.231.85.117.1.1",              # AMS Net ID of the PLC
+    "port": 851,                                    # Communication port
+    "ip_address": None,                             # IP address of the PLC, None = use the ADS route of the AMS Net ID
+    "variable_prefix": "Main.",                     # Prefix of all PLC variables of this station (program or instance name)
+    "cpus": None,                                   # Cores the station process is pinned to (station list only), None = assigned by the supervisor
+    "settings": {},                                 # Detection settings that differ from gear_detection.default_settings
+    "coordinate_transfer_mode": "per_point",        # "per_point": one write per value, "bulk": packed REAL arrays + coord_count (needs <prefix>coord_count)
+    "start_pulse_mode": "notification",             # "notification": start pulse pushed by an ADS device notification, "polling": read every 0.1 s
+    "timeout_s": 10,                                # Timeout time for finding the gear
+    "output_directory": ".",                        # Directory of all files of this station
+    "metrics_enabled": True,                        # Measure the latency of every stage and count rejected frames
+    "metrics_filename": "gear_metrics.txt",         # Text file with the latest metrics
+    "metrics_interval_s": 5.0,                      # Time between two exports of the metrics to the file and the PLC
+    "metrics_to_plc": False,                        # Also write the metrics to the PLC (needs the <prefix>metrics_* variables)
+    "profile_cache_enabled": False,                 # Known gears: send the recipe ID and the rotation offset (needs <prefix>recipe_id and <prefix>rotation_offset_deg)
+    "profile_cache_filename": "gear_profile_cache.npz",  # File of the gear profile cache (kept between runs)
+    "profile_cache_size": 32,                       # Number of gear types in the cache
+    "archive_directory": "gear_archive",            # Directory of the per-part archive, None = no archive
+    "archive_max_files": 1000,                      # Maximum number of parts in the archive
+    "archive_max_mb": 100,                          # Maximum size of the archive in MB
+    "csv_filename": "contour_coordinates_mm_&_degrees.csv",  # CSV export of the newest part, None = off
+    "result_image_filename": "Result_gear.png",     # Result image of the newest part, None = off
+}
+
+
+## Function to complete a station config with the defaults (the detection settings are merged one level deeper)
+def station_config(config):
+    merged = dict(default_station_config, **config)
+    merged["settings"] = dict(default_settings, **config.get("settings", {}))
+    return merged
+
+
+## Function to send a status message to TwinCAT
+def send_status_to_twincat(text, plc, variable_name="Main.status_message"):
+    try:
+        if plc and plc.is_open:                                                 # Check if the PLC connection is open
+            plc.write_by_name(variable_name, text, pyads.PLCTYPE_STRING)        # Write the status
+            print(f"Message '{text}' successfully sent to TwinCAT.")
+        else:
+            print("Unable to connect to the PLC.")
+    except Exception as e:
+        print(f"Error while sending: {e}")
+
+
+## Function to send the next move to TwinCAT
+def send_next_move_to_twincat(text, plc, variable_name="Main.next_move"):
+    try:
+        if plc and plc.is_open:                                                 # Check if the PLC connection is open
+            plc.write_by_name(variable_name, text, pyads.PLCTYPE_STRING)        # Write the next move instruction
+            print(f"Message '{text}' successfully sent to TwinCAT.")
+        else:
+            print("Unable to connect to the PLC.")
+    except Exception as e:
+        print(f"Error while sending: {e}")
+
+
+## Function to open the camera of a station, or the replayed frames when the config has a replay
+def open_camera(config):
+    replay = config["replay"]
+    if replay == "synthetic":
+        return synthetic_replay(60, width=config["camera_width"], height=config["camera_height"], fps=config["camera_fps"])
+    if replay and replay.endswith(".bag"):
+        return BagPlayback(replay)                                              # Streamed at recording speed, not loaded into memory
+    if replay:
+        return load_recording(replay, fps=config["camera_fps"])
+
+    import pyrealsense2 as rs   # Accessing depth and RGB data from the camera (only needed with a real camera)
+    pipeline = rs.pipeline()                                                    # Create a pipeline. Pipeline = Managing data of camera
+    rs_config = rs.config()                                                     # Create a configuration. (specify data of camera)
+    if config["camera_serial"]:
+        rs_config.enable_device(str(config["camera_serial"]))                   # The camera of this station
+    width, height, fps = config["camera_width"], config["camera_height"], config["camera_fps"]
+    rs_config.enable_stream(rs.stream.color, width, height, rs.format.bgr8, fps)  # Enable color stream
+    rs_config.enable_stream(rs.stream.depth, width, height, rs.format.z16, fps)  # Enable depth stream
+    pipeline.start(rs_config)                                                   # Start the RealSense pipeline
+    return pipeline
+
+
+## One station: the capture/detect/upload loop of one camera and one PLC
+class GearStation:
+    def __init__(self, config, status_callback=None, stop_event=None):
+        self.config = station_config(config)
+        self.name = self.config["name"]
+        self.status_callback = status_callback                                  # Called with a status dict on every state change, None = off
+        self.stop_event = stop_event or threading.Event()                       # Set to stop the station after the current cycle
+
+    ## Function to get the full name of a PLC variable of this station
+    def variable(self, name):
+        return self.config["variable_prefix"] + name
+
+    ## Function to get the path of a file of this station
+    def path(self, filename):
+        return os.path.join(self.config["output_directory"], filename) if filename else None
+
+    ## Function to report the state of the station (e.g. to the supervisor)
+    def report(self, state, message=""):
+        if self.status_callback is None:
+            return
+        with self.metrics.lock:
+            counters = dict(self.metrics.counters)
+        try:
+            self.status_callback({"station": self.name, "pid": os.getpid(), "state": state, "message": message,
+                                  "time": time.time(), "counters": counters})
+        except Exception as e:
+            print(f"Error while reporting the status: {e}")
+
+    ## Function to open the PLC connection and the camera and start all stages
+    def open(self):
+        config = self.config
+        os.makedirs(config["output_directory"], exist_ok=True)
+        self.metrics = Metrics(config["metrics_enabled"])                       # Latency histograms and counters of all stages
+        self.plc = pyads.Connection(config["ams_net_id"], config["port"], config["ip_address"])  # Create PLC connection
+        self.plc.open()                                                         # Open the PLC connection
+        self.symbol_cache = {}                                                  # Index group/offset of the PLC variables, looked up once
+        try:
+            self.check_plc_variables()                                          # Fail at the start, not silently in every cycle
+        except RuntimeError:
+            self.plc.close()
+            raise
+        self.profile_cache = (GearProfileCache(config["profile_cache_size"], self.path(config["profile_cache_filename"]))
+                              if config["profile_cache_enabled"] else None)     # Known gear types
+        self.symbol_version_notification = watch_symbol_version(
+            self.plc, self.symbol_cache, self.profile_cache.plc_version_changed if self.profile_cache is not None else None)  # Cleared again after a download
+        archive_directory = self.path(config["archive_directory"])
+        archive = (ResultArchive(archive_directory, config["archive_max_files"], config["archive_max_mb"] * 1024 * 1024)
+                   if archive_directory else None)
+
+        self.pipeline = open_camera(config)
+        self.io_worker = IoWorker()                                             # PLC writes, in order
+        self.handshake = PlcHandshake(self.plc, config["start_pulse_mode"], self.variable("startprocess"), self.variable("restart"),
+                                      self.variable("coordinatesreceived"), io_worker=self.io_worker)  # Start pulse and status flags of the PLC
+        self.handshake.open()                                                   # Subscribe to the start pulse
+        self.handshake.set_restart(False)                                       # Reset 'restart' in the PLC
+
+        ## Start the pipeline stages
+        frame_slot = LatestSlot()                                               # Newest color/depth pair only
+        self.capture = CaptureThread(self.pipeline, frame_slot, self.metrics)   # Capture stage
+        self.detector = DetectionWorker(frame_slot, config["settings"], self.metrics)  # Detection stage
+        self.persistence = PersistenceWorker(archive, self.path(config["csv_filename"]), self.path(config["result_image_filename"]),
+                                             metrics=self.metrics)              # File writes, off the PLC path
+        metric_variables = {self.variable(name.split(".", 1)[1]): metric for name, metric in plc_metric_variables.items()}
+        self.exporter = MetricsExporter(self.metrics, config["metrics_interval_s"], self.path(config["metrics_filename"]),
+                                        self.io_worker, self.plc if config["metrics_to_plc"] else None,
+                                        metric_variables)                       # Metrics file and (optional) PLC variables
+        self.cache_saver = (ProfileCacheSaver(self.profile_cache, config["metrics_interval_s"])
+                            if self.profile_cache is not None else None)        # Cache file: new gear types at once, LRU order every interval
+        self.stages = [self.capture, self.detector, self.io_worker, self.persistence]
+        if config["metrics_enabled"]:
+            self.stages.append(self.exporter)
+        if self.cache_saver is not None:
+            self.stages.append(self.cache_saver)
+        for stage in self.stages:
+            stage.start()
+
+    ## Function to check that the PLC program has every variable of the enabled modes; raises a RuntimeError naming the missing ones
+    def check_plc_variables(self):
+        config = self.config
+        names = ["startprocess", "restart", "coordinatesreceived", "status_message", "next_move", "x_coords", "y_coords"]
+        if config["coordinate_transfer_mode"] == "bulk":
+            names.append("coord_count")
+        if config["profile_cache_enabled"]:
+            names += ["recipe_id", "rotation_offset_deg"]
+        if config["metrics_enabled"] and config["metrics_to_plc"]:
+            names += [name.split(".", 1)[1] for name in plc_metric_variables]
+        missing = []
+        for name in names:
+            try:
+                get_symbol_location(self.plc, self.variable(name), self.symbol_cache)
+            except pyads.ADSError:
+                missing.append(self.variable(name))
+        if missing:
+            raise RuntimeError(f"PLC program of station {self.name} has no variable {', '.join(missing)}; "
+                               "update the PLC program or turn off the modes that need these variables")
+
+    ## Function to stop all stages and close the camera and the PLC connection
+    def close(self):
+        self.capture.stop()                                                     # Stop the capture stage
+        self.detector.stop()                                                    # Stop the detection stage
+        if self.exporter in self.stages:
+            self.exporter.stop()                                                # Write the last metrics
+            self.exporter.join(timeout=2)
+        self.io_worker.stop()                                                   # Finish the queued PLC writes
+        self.persistence.stop()                                                 # Finish the queued file writes
+        if self.cache_saver is not None:
+            self.cache_saver.stop()                                             # Save the last LRU order of the gear types
+            self.cache_saver.join(timeout=5)
+        self.capture.join(timeout=2)
+        self.pipeline.stop()                                                    # Stop the camera pipeline
+        self.handshake.close()                                                  # Remove the start pulse notification
+        try:
+            if self.symbol_version_notification and self.plc.is_open:
+                self.plc.del_device_notification(*self.symbol_version_notification)
+        except Exception as e:
+            print(f"Error while removing the symbol version notification: {e}")
+        self.plc.close()                                                        # Close the connection to the PLC
+
+    ## Function to send a status message to TwinCAT now (on the I/O worker)
+    def write_status(self, text):
+        self.metrics.timed("io.status_write", send_status_to_twincat)(text, self.plc, self.variable("status_message"))
+
+    ## Function to queue a status message for TwinCAT
+    def send_status(self, text):
+        self.io_worker.submit(self.write_status, text)
+
+    ## Function to queue a next move for TwinCAT
+    def send_next_move(self, text):
+        self.io_worker.submit(send_next_move_to_twincat, text, self.plc, self.variable("next_move"))
+
+    ## Function to upload the full path of a gear; an unknown gear type is stored in the cache once the PLC has its path (I/O worker)
+    ## Returns True when the PLC has the path
+    def upload_gear(self, gear, profile, signature):
+        x_coords_mm, y_coords_deg = gear["distances_mm"], gear["angles_deg"]
+        if self.config["coordinate_transfer_mode"] == "bulk":
+            upload = self.metrics.timed("io.coordinate_upload", send_coordinates_to_twincat_bulk)
+            sent = upload(x_coords_mm, y_coords_deg, self.plc, self.symbol_cache, self.variable("x_coords"), self.variable("y_coords"),
+                          self.variable("coord_count"), metrics=self.metrics)
+        else:
+            upload = self.metrics.timed("io.coordinate_upload", send_coordinates_to_twincat)
+            sent = upload(x_coords_mm, y_coords_deg, self.config["ams_net_id"], self.config["port"], metrics=self.metrics,
+                          x_variable=self.variable("x_coords"), y_variable=self.variable("y_coords"),
+                          ip_address=self.config["ip_address"])
+        if sent and self.profile_cache is not None:
+            recipe_id = self.profile_cache.add(gear, profile, signature)
+            if not send_recipe_to_twincat(recipe_id, 0.0, self.plc, self.symbol_cache,
+                                          self.variable("recipe_id"), self.variable("rotation_offset_deg")):  # The PLC stores the uploaded path under this recipe
+                self.profile_cache.remove(recipe_id)                            # The PLC does not know this recipe
+            self.cache_saver.request_save()                                     # Written to disk by the saver thread, never dropped
+        return sent
+
+    ## Function to send a found gear to the PLC and finish the handshake (one I/O job, so every step sees the result of the upload)
+    ## 'coordinatesreceived' is only set when the PLC has the path or the recipe; otherwise the PLC gets an error status
+    def transfer_gear(self, gear, recipe_id, rotation_offset_deg, profile, signature, cycle_start):
+        self.write_status("Gear found")
+        self.handshake.set_restart(True)
+        sent = False
+        if recipe_id is not None:
+            self.write_status(f"Known gear, sending recipe {recipe_id}")
+            sent = self.metrics.timed("io.recipe_upload", send_recipe_to_twincat)(
+                recipe_id, rotation_offset_deg, self.plc, self.symbol_cache, self.variable("recipe_id"), self.variable("rotation_offset_deg"))
+            if sent:
+                self.write_status("Recipe successfully sent")
+            else:
+                self.write_status("Error: recipe not sent")
+                self.profile_cache.remove(recipe_id)                            # The full path is sent (and cached) again below
+        if not sent:                                                            # New gear type, or the PLC did not take the recipe
+            self.write_status("Sending coordinates")
+            sent = self.upload_gear(gear, profile, signature)
+            self.write_status("Coordinates successfully sent" if sent else "Error: coordinates not sent")
+        if sent:
+            self.write_status("Process completed")
+        send_next_move_to_twincat("Ready for new input", self.plc, self.variable("next_move"))
+        self.handshake.set_restart(False)
+        if sent:
+            self.handshake.set_process_completed()
+            self.metrics.record("cycle", cycle_start, time.monotonic)           # Start pulse until process completed
+        else:
+            self.metrics.count("cycles_failed")
+        return sent
+
+    ## Function to queue everything that has to happen after a gear was found: the PLC transfer on the I/O worker,
+    ## files on the persistence worker, so the PLC gets 'coordinatesreceived' as soon as the upload is done
+    def report_gear(self, color_image, gear, cycle_start):
+        metrics = self.metrics
+
+        ## Look up the gear type; a known gear only needs its rotation offset
+        recipe_id, rotation_offset_deg, profile, signature = None, 0.0, None, None
+        if self.profile_cache is not None:
+            start = metrics.start()
+            recipe_id, rotation_offset_deg, profile, signature = self.profile_cache.lookup(gear)
+            metrics.record("profile_cache_lookup", start)
+            metrics.count("profile_cache_hits" if recipe_id is not None else "profile_cache_misses")
+
+        self.persistence.save_result(color_image, gear, recipe_id, rotation_offset_deg)  # Archive, CSV and result image
+        self.io_worker.submit(self.transfer_gear, gear, recipe_id, rotation_offset_deg, profile, signature, cycle_start)
+
+    ## Main loop of the station: wait for the start pulse, search the gear, report it; returns when the stop event is set
+    def run(self):
+        self.open()
+        self.report("started")
+        try:
+            processing = False
+            while not self.stop_event.is_set():
+                if not processing:
+                    # Wait for the start pulse
+                    self.send_next_move("Waiting for start pulse...")           # Send message to TwinCAT to wait for the start signal
+                    if not self.handshake.wait_for_start(stop_event=self.stop_event,
+                                                         heartbeat=lambda: self.report("waiting")):  # Wait until the start signal is detected
+                        break
+
+                    # Start run mode
+                    cycle_start = time.monotonic()                              # Start of the cycle for the metrics
+                    self.detector.start_cycle()                                 # Search the gear in frames from now on
+                    self.send_status("Searching for gear")
+                    self.send_next_move("Idle")
+                    print(f"{self.name}: Run mode started. Processing image...")
+                    self.report("searching")
+                    processing = True
+                    self.io_worker.call(self.handshake.acknowledge_start)       # Wait for the reset, so the pulse is not seen again
+
+                ## Main processing loop
+                start_time = time.time()                                        # Record the start time
+
+                while processing and not self.stop_event.is_set():
+                    elapsed_time = time.time() - start_time                     # Calculate the elapsed time since the process started
+
+                    # Check for a new start pulse during processing
+                    if self.handshake.start_requested():                        # If a start pulse is detected:
+                        self.detector.cancel()                                  # Stop searching
+                        self.metrics.count("restarts")
+                        self.send_status("Restarting process")
+                        print(f"{self.name}: Start pulse received during processing. Restarting...")
+                        processing = False                                      # Stop the current processing loop
+                        self.io_worker.call(self.handshake.acknowledge_start)   # Reset the start pulse
+                        break                                                   # Exit the current processing loop and restart the main loop
+
+                    # Check for timeout
+                    if elapsed_time > self.config["timeout_s"]:
+                        self.detector.cancel()                                  # Stop searching
+                        self.metrics.count("timeouts")
+                        self.send_status("Timeout occurred. No gear found.")
+                        self.report("timeout", "No gear found")
+                        processing = False                                      # Stop the current processing loop
+                        break                                                   # Exit the current processing loop and restart the main loop
+
+                    # Wait a short time for the detection stage
+                    result = self.detector.wait_result(0.03)
+                    if result is None:
+                        continue
+
+                    color_image, gear = result
+                    self.metrics.count("gears_found")                           # Counted here: results of cancelled cycles are dropped
+                    self.metrics.record("time_to_gear_found", cycle_start, time.monotonic)
+                    self.report_gear(color_image, gear, cycle_start)
+                    print(f"{self.name}: Processing completed.")
+                    self.report("gear found", f"Diameter {gear['diameter_mm']:.2f} mm")
+                    processing = False                                          # Set processing to False, awaiting the next pulse
+                    break                                                       # Exit the current processing loop and restart the main loop
+
+        except KeyboardInterrupt:                                               # Manual interruption of the program
+            print("Program interrupted manually.")
+        finally:
+            self.close()
+            self.report("stopped")
@@ -0,0 +1,224 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: MULTI-STATION RUNNER: ONE PROCESS PER CAMERA/PLC PAIR, PINNED TO CORES, WITH A SUPERVISOR THAT RESTARTS CRASHED STATIONS
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import argparse                 # Command line options
+import json                     # Station list
+import multiprocessing          # One process per station
+import os                       # Core pinning
+import queue                    # Status messages of the stations
+import threading                # Simulated start pulses of the fake PLCs
+import time                     # Time module
+import traceback                # Error report of a crashed station
+
+## Parameters
+restart_delay_s = 1.0           # Delay before a crashed station is started again
+max_restart_delay_s = 30.0      # Longest delay when a station keeps crashing (the delay doubles on every quick crash)
+stable_run_s = 60.0             # A station that ran this long before crashing starts again with the shortest delay
+status_interval_s = 5.0         # Time between two status tables of the supervisor
+
+
+## Function to read the station list: {"defaults": {...}, "stations": [{...}, ...]}; every station gets the defaults first
+def load_stations(filename):
+    with open(filename) as file:
+        station_list = json.load(file)
+    defaults = station_list.get("defaults", {})
+    stations = []
+    for index, station in enumerate(station_list["stations"]):
+        config = dict(defaults, **station)
+        config["settings"] = dict(defaults.get("settings", {}), **station.get("settings", {}))  # Per-station thresholds
+        config.setdefault("name", f"station{index + 1}")
+        config.setdefault("output_directory", config["name"])                   # Files of different stations never mix
+        stations.append(config)
+    names = [config["name"] for config in stations]
+    if len(set(names)) != len(names):
+        raise ValueError("Station names in the station list must be unique")
+    return stations
+
+
+## Function to give every station without "cpus" one core of its own (round robin over the cores this program may use)
+def assign_cpus(stations):
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+    taken = {cpu for config in stations for cpu in (config.get("cpus") or [])}
+    free = [cpu for cpu in available if cpu not in taken] or available
+    next_cpu = 0
+    for config in stations:
+        if not config.get("cpus"):
+            config["cpus"] = [free[next_cpu % len(free)]]
+            next_cpu += 1
+    return stations
+
+
+## Function that runs in the process of one station: pin it to its cores, run the station loop, report a crash
+def station_process(config, status_queue, stop_event):
+    import cv2                  # OpenCV library for image and video processing
+    from gear_station import GearStation  # Imported in the station process itself
+
+    cpus = config.get("cpus") or []
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)                                           # Heavy OpenCV work of this station stays on its own cores
+    cv2.setNumThreads(max(1, len(cpus)))                                        # No OpenCV worker threads on the cores of other stations
+
+    try:
+        GearStation(config, status_queue.put, stop_event).run()
+    except Exception as e:
+        status_queue.put({"station": config["name"], "pid": os.getpid(), "state": "crashed", "message": f"{type(e).__name__}: {e}",
+                          "time": time.time(), "traceback": traceback.format_exc()})
+        raise SystemExit(1)
+
+
+## Supervisor: starts one process per station, collects their status and restarts crashed stations
+class StationSupervisor:
+    def __init__(self, stations):
+        self.context = multiprocessing.get_context("spawn")                    # Clean processes, no copied threads or PLC connections
+        self.stations = {config["name"]: config for config in assign_cpus(stations)}
+        self.status_queue = self.context.Queue()
+        self.processes = {}                                                     # name -> process
+        self.stop_events = {}                                                   # name -> stop event of the process
+        self.started = {}                                                       # name -> start time of the process
+        self.restart_at = {}                                                    # name -> time of the next restart of a crashed station
+        self.restart_delays = {name: restart_delay_s for name in self.stations}
+        self.restarts = {name: 0 for name in self.stations}
+        self.status = {name: {"state": "not started", "message": "", "counters": {}} for name in self.stations}
+        self.stopping = False
+
+    ## Function to start the process of one station
+    def start_station(self, name):
+        stop_event = self.context.Event()
+        process = self.context.Process(target=station_process, args=(self.stations[name], self.status_queue, stop_event),
+                                       name=f"station-{name}", daemon=True)
+        process.start()
+        self.processes[name], self.stop_events[name], self.started[name] = process, stop_event, time.time()
+        self.status[name].update(state="starting", pid=process.pid)
+        print(f"Station {name} started (pid {process.pid}, cores {self.stations[name]['cpus']}).")
+
+    ## Function to start all stations
+    def start(self):
+        for name in self.stations:
+            self.start_station(name)
+
+    ## Function to read the status messages of the stations
+    def collect_status(self, timeout=0.5):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                status = self.status_queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                return
+            name = status["station"]
+            if name in self.status:
+                self.status[name].update(status)
+                if status["state"] == "crashed":
+                    print(f"Station {name} crashed: {status['message']}\n{status.get('traceback', '')}")
+
+    ## Function to restart stations whose process ended without a stop request
+    def check_processes(self):
+        now = time.time()
+        for name, process in self.processes.items():
+            if process.is_alive() or self.stopping:
+                continue
+            if name not in self.restart_at:
+                ran_for = now - self.started[name]
+                if ran_for >= stable_run_s:
+                    self.restart_delays[name] = restart_delay_s                 # It ran fine for a while: restart quickly
+                self.restart_at[name] = now + self.restart_delays[name]
+                self.status[name].update(state="crashed", exit_code=process.exitcode)
+                print(f"Station {name} stopped with exit code {process.exitcode}, restart in {self.restart_delays[name]:.1f} s.")
+                self.restart_delays[name] = min(self.restart_delays[name] * 2, max_restart_delay_s)
+            elif now >= self.restart_at[name]:
+                del self.restart_at[name]
+                self.restarts[name] += 1
+                self.start_station(name)
+
+    ## Function to print one line per station
+    def print_status(self):
+        print(f"\n{'station':12s} {'pid':>7s} {'state':12s} {'restarts':>8s} {'gears':>6s} {'timeouts':>8s}  message")
+        for name, status in self.status.items():
+            counters = status.get("counters", {})
+            print(f"{name:12s} {status.get('pid') or 0:7d} {status['state']:12s} {self.restarts[name]:8d} "
+                  f"{counters.get('gears_found', 0):6d} {counters.get('timeouts', 0):8d}  {status.get('message', '')}")
+
+    ## Function to supervise the stations until `duration` seconds have passed (None = until interrupted)
+    def supervise(self, duration=None):
+        end_time = None if duration is None else time.time() + duration
+        next_print = time.time() + status_interval_s
+        try:
+            while end_time is None or time.time() < end_time:
+                self.collect_status()
+                self.check_processes()
+                if time.time() >= next_print:
+                    self.print_status()
+                    next_print = time.time() + status_interval_s
+        except KeyboardInterrupt:                                               # Manual interruption of the program
+            print("Program interrupted manually.")
+
+    ## Function to stop all stations (after their current cycle) and wait for their processes
+    def stop(self, timeout=10.0):
+        self.stopping = True
+        for stop_event in self.stop_events.values():
+            stop_event.set()
+        deadline = time.time() + timeout
+        for name, process in self.processes.items():
+            process.join(max(0.1, deadline - time.time()))
+            if process.is_alive():
+                print(f"Station {name} did not stop, terminating it.")
+                process.terminate()
+                process.join(1)
+        self.collect_status(0.1)
+
+
+## Function to start one local fake ADS endpoint per station (own loopback IP address and AMS Net ID) for tests without PLCs
+def start_fake_plcs(stations):
+    from fake_twincat import start_fake_plc, prefixed_variables
+
+    fake_plcs = {}
+    for index, config in enumerate(stations):
+        ip_address = f"127.0.0.{index + 2}"                                     # Every fake PLC listens on its own loopback address
+        server, handler = start_fake_plc(ip_address, prefixed_variables(config.get("variable_prefix", "Main.")))
+        config.update(ip_address=ip_address, ams_net_id=f"{ip_address}.1.1", port=851)
+        fake_plcs[config["name"]] = (server, handler)
+    return fake_plcs
+
+
+## Function to give start pulses to all fake PLCs every `interval` seconds (simulated PLC programs)
+def give_start_pulses(fake_plcs, stations, interval, stop_event):
+    import pyads                # PLC data types
+
+    while not stop_event.wait(interval):
+        for config in stations:
+            handler = fake_plcs[config["name"]][1]
+            handler.write_value(config.get("variable_prefix", "Main.") + "startprocess", True, pyads.PLCTYPE_BOOL)
+
+
+## Main function to run this script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several deburring stations, one process per camera/PLC pair.")
+    parser.add_argument("station_list", help="JSON file with the station list")
+    parser.add_argument("--fake-plc", action="store_true", help="Start one local fake ADS endpoint per station")
+    parser.add_argument("--pulse-interval", type=float, default=0.0, help="With --fake-plc: give a start pulse every n seconds")
+    parser.add_argument("--duration", type=float, help="Stop after n seconds (default: run until interrupted)")
+    args = parser.parse_args()
+
+    stations = load_stations(args.station_list)
+    fake_plcs, pulse_stop = {}, threading.Event()
+    if args.fake_plc:
+        fake_plcs = start_fake_plcs(stations)
+        if args.pulse_interval > 0:
+            threading.Thread(target=give_start_pulses, args=(fake_plcs, stations, args.pulse_interval, pulse_stop), daemon=True).start()
+
+    supervisor = StationSupervisor(stations)
+    supervisor.start()
+    try:
+        supervisor.supervise(args.duration)
+    finally:
+        pulse_stop.set()
+        supervisor.stop()
+        supervisor.print_status()
+        for server, _ in fake_plcs.values():
+            server.close()
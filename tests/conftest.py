@@ -0,0 +1,28 @@
+## Shared fixtures of the tests: the modules of this project are in the parent directory
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+## One fake PLC for all tests; its memory is cleared before every test
+@pytest.fixture(scope="session")
+def fake_plc():
+    from fake_twincat import start_fake_plc, connect_to_fake_plc
+
+    server, handler = start_fake_plc()
+    plc = connect_to_fake_plc()
+    yield plc, handler
+    plc.close()
+    server.close()
+
+
+@pytest.fixture
+def plc_and_handler(fake_plc):
+    plc, handler = fake_plc
+    with handler.lock:
+        handler.memory[:] = bytes(len(handler.memory))
+    handler.notifications_enabled = True
+    handler.reset_counters()
+    return plc, handler
@@ -0,0 +1,70 @@
+## Tests of the gear detection: the coarse-to-fine ROI search must give the same result as the full-frame search
+import cv2
+import numpy as np
+import pytest
+from gear_detection import detect_gear, default_settings, GearTracker
+from gear_replay import synthetic_gear_frame, ReplayDepthFrame
+
+
+## Synthetic gear with random tooth count, diameter, position and rotation
+def random_gear_frame(seed):
+    rng = np.random.default_rng(seed)
+    width, height = [(640, 480), (1280, 720)][seed % 2]
+    diameter_mm = float(rng.uniform(50, 150))
+    margin = diameter_mm / 2 * default_settings["pixels_per_mm_at_reference_distance"] + 10
+    center = (float(rng.uniform(margin, width - margin)), float(rng.uniform(margin, height - margin)))
+    color_image, depth = synthetic_gear_frame(teeth=int(rng.integers(8, 41)), diameter_mm=diameter_mm, width=width, height=height,
+                                              center=center, rotation_deg=float(rng.uniform(0, 360)), seed=seed)
+    return color_image, ReplayDepthFrame(depth)
+
+
+@pytest.mark.parametrize("seed", range(80))
+def test_roi_mode_matches_full_mode(seed):
+    color_image, depth_frame = random_gear_frame(seed)
+    full_message, full_gear = detect_gear(color_image, depth_frame, dict(default_settings, detection_mode="full"))
+    tracker = GearTracker(dict(default_settings, detection_mode="roi"))
+    if full_gear is None:                                                       # E.g. few deep teeth: rejected as not circular
+        assert tracker.detect(color_image, depth_frame) == (full_message, None)
+        return
+
+    for _ in range(2):                                                          # First frame: coarse search, second frame: tracked ROI
+        message, roi_gear = tracker.detect(color_image, depth_frame)
+        assert roi_gear is not None, message
+        assert roi_gear["diameter_mm"] == pytest.approx(full_gear["diameter_mm"], abs=0.5)
+        np.testing.assert_allclose(roi_gear["center"], full_gear["center"], atol=1.0)
+
+
+def test_roi_mode_falls_back_to_the_full_frame(monkeypatch):
+    color_image, depth_frame = random_gear_frame(0)
+    tracker = GearTracker(dict(default_settings, detection_mode="roi"))
+    monkeypatch.setattr(tracker, "find_coarse_roi", lambda gray: (0, 0, 40, 40))  # Coarse search picked a wrong object
+    message, gear = tracker.detect(color_image, depth_frame)
+    assert gear is not None, message
+    x, y = gear["center"]
+    x0, y0, x1, y1 = tracker.roi                                                # The gear is tracked from the next frame on
+    assert x0 < x < x1 and y0 < y < y1
+
+
+def test_full_frame_fallback_is_rate_limited(monkeypatch):
+    color_image, depth_frame = random_gear_frame(0)
+    settings = dict(default_settings, detection_mode="roi", max_diameter_mm=45)  # Gear out of range: every frame fails
+    tracker = GearTracker(settings)
+    for _ in range(3 * settings["full_frame_fallback_interval"]):
+        message, gear = tracker.detect(color_image, depth_frame)
+        assert gear is None
+        assert message.startswith("Object: diameter")
+    assert tracker.fallbacks == 3
+
+
+def test_gear_bigger_than_the_coarse_roi_falls_back_at_once(monkeypatch):
+    color_image, depth_frame = random_gear_frame(0)
+    tracker = GearTracker(dict(default_settings, detection_mode="roi"))
+    tracker.frames_since_fallback = 0                                           # Just fell back on the previous frame
+    full_gear = detect_gear(color_image, depth_frame)[1]
+    x, y = int(full_gear["center"][0] + full_gear["radius"]), int(full_gear["center"][1])
+    monkeypatch.setattr(tracker, "find_coarse_roi", lambda gray: (x - 40, y - 40, x + 40, y + 40))  # Only a piece of the gear edge
+    assert tracker.detect_in_roi(cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY), depth_frame, (x - 40, y - 40, x + 40, y + 40))[0] == \
+        "Object extends beyond the search region"
+    message, gear = tracker.detect(color_image, depth_frame)
+    assert gear is not None, message
+    assert tracker.fallbacks == 1
@@ -0,0 +1,70 @@
+## Tests of the contour to distance/angle conversion
+import cv2
+import numpy as np
+import pytest
+from gear_geometry import reorder_contour, contour_to_polar, resample_polar_profile
+from gear_replay import synthetic_gear_frame
+
+
+## The per-point conversion of the original main() loop, as reference for the vectorized version
+def loop_conversion(contour, x, y, pixels_per_mm):
+    vertical_x = int(x)
+    start_point = min(contour, key=lambda p: abs(p[0][0] - vertical_x))
+    start_index = np.where((contour == start_point).all(axis=2))[0][0]
+    reordered_contour = np.concatenate((contour[start_index:], contour[:start_index]))
+
+    x_coords_mm, y_coords_deg = [], []
+    for point in reordered_contour:
+        pixel_x, pixel_y = point[0]
+        mm_x = (pixel_x - x) / pixels_per_mm
+        mm_y = (pixel_y - y) / pixels_per_mm
+        x_coords_mm.append(np.sqrt(mm_x**2 + mm_y**2))
+        y_coords_deg.append((np.degrees(np.arctan2(mm_y, mm_x)) + 90) % 360)
+
+    first_point_x, first_point_y = start_point[0]
+    first_angle_deg = (np.degrees(np.arctan2(first_point_y - y, first_point_x - x)) + 90) % 360
+    if 170 <= first_angle_deg <= 190:
+        y_coords_deg = [(angle + 180) % 360 for angle in y_coords_deg]
+    return reordered_contour, x_coords_mm, y_coords_deg
+
+
+## Largest contour and enclosing circle of a synthetic gear, like the detection finds them
+def synthetic_contour(seed):
+    rng = np.random.default_rng(seed)
+    color_image, _ = synthetic_gear_frame(teeth=int(rng.integers(8, 41)), diameter_mm=float(rng.uniform(50, 150)),
+                                          rotation_deg=float(rng.uniform(0, 360)), seed=seed)
+    edges = cv2.Canny(cv2.GaussianBlur(cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY), (5, 5), 0), 25, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    contour = max(contours, key=cv2.contourArea)
+    (x, y), _ = cv2.minEnclosingCircle(contour)
+    return contour, x, y
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_conversion_matches_the_loop(seed):
+    contour, x, y = synthetic_contour(seed)
+    pixels_per_mm = 2.45
+    expected_contour, expected_distances, expected_angles = loop_conversion(contour, x, y, pixels_per_mm)
+
+    reordered_contour, _ = reorder_contour(contour, x)
+    distances, angles = contour_to_polar(reordered_contour, x, y, pixels_per_mm)
+    np.testing.assert_array_equal(reordered_contour, expected_contour)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-12)
+    np.testing.assert_allclose(angles, expected_angles, atol=1e-9)
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_resampling_follows_the_radial_profile(direction):
+    ## Dense contour of a known profile r(angle), running clockwise or counter-clockwise
+    angles = np.radians(np.linspace(0, 360, 5000, endpoint=False)) * direction
+    radii = 50 + 3 * np.sin(12 * angles)
+    contour = np.stack([200 + radii * np.sin(angles), 200 - radii * np.cos(angles)], axis=1).reshape(-1, 1, 2)
+    distances, contour_angles = contour_to_polar(contour, 200, 200, 1.0)
+
+    resampled_distances, resampled_angles = resample_polar_profile(distances, contour_angles, 720)
+    assert len(resampled_distances) == len(resampled_angles) == 720
+    assert resampled_angles[0] == pytest.approx(contour_angles[0])
+    steps = np.diff(np.unwrap(np.radians(resampled_angles)))
+    np.testing.assert_allclose(np.degrees(steps), direction * 0.5, atol=1e-9)   # Uniform grid in the direction of the contour
+    expected = 50 + 3 * np.sin(12 * np.radians(resampled_angles))
+    np.testing.assert_allclose(resampled_distances, expected, atol=0.01)
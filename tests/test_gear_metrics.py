@@ -0,0 +1,81 @@
+## Tests of the metrics: histograms, counters, the disabled fast path and the export to the local fake TwinCAT PLC
+import pyads
+import pytest
+from gear_metrics import Metrics, MetricsExporter, plc_metric_variables, detection_counter_name
+from gear_pipeline import IoWorker
+
+
+## Metrics exporter with a running I/O worker; the worker is stopped by the caller
+def make_exporter(plc, tmp_path, plc_variables=plc_metric_variables):
+    metrics = Metrics()
+    metrics.count("gears_found", 3)
+    metrics.add_latency("detection", 0.02)
+    io_worker = IoWorker()
+    io_worker.start()
+    return MetricsExporter(metrics, 60, str(tmp_path / "metrics.txt"), io_worker, plc, plc_variables), io_worker
+
+
+def test_snapshot_has_percentiles_of_the_latest_window():
+    metrics = Metrics(window=100)
+    for milliseconds in range(1, 201):                                          # Only 101..200 ms stay in the window
+        metrics.add_latency("detection", milliseconds / 1000)
+    metrics.count("gears_found")
+    metrics.count("gears_found", 2)
+    snapshot = metrics.snapshot()
+    assert snapshot["detection.count"] == 100
+    assert snapshot["detection.p50_ms"] == pytest.approx(150.5)
+    assert snapshot["detection.p95_ms"] == pytest.approx(195.05)
+    assert snapshot["detection.max_ms"] == pytest.approx(200)
+    assert snapshot["gears_found"] == 3
+
+
+def test_timed_records_every_call_also_when_it_fails():
+    metrics = Metrics()
+    timed = metrics.timed("io.job", lambda value: 1 / value)
+    assert timed(4) == 0.25
+    with pytest.raises(ZeroDivisionError):
+        timed(0)
+    assert metrics.snapshot()["io.job.count"] == 2
+
+
+def test_disabled_metrics_cost_nothing():
+    metrics = Metrics(enabled=False)
+
+    def function():
+        return 1
+    assert metrics.timed("io.job", function) is function                       # No wrapper on the hot path
+    assert metrics.start() is None
+    assert metrics.stage_timer("detection") is None
+    metrics.record("detection", metrics.start())
+    metrics.count("gears_found")
+    metrics.add_latency("detection", 0.01)
+    assert metrics.latencies == {} and metrics.counters == {}
+
+
+def test_detection_messages_have_counters():
+    assert detection_counter_name("Object: diameter (30.00 mm) is not between 40 mm and 180 mm.") == "diameter_out_of_range"
+    assert detection_counter_name("Object not circular") == "not_circular"
+    assert detection_counter_name("Something else") == "other_rejections"
+
+
+def test_metrics_are_written_to_the_plc(plc_and_handler, tmp_path):
+    plc, handler = plc_and_handler
+    exporter, io_worker = make_exporter(plc, tmp_path)
+    exporter.export()
+    io_worker.stop()
+    assert handler.read_value("Main.metrics_gears_found", pyads.PLCTYPE_DINT) == 3
+    assert abs(handler.read_value("Main.metrics_detection_p95_ms", pyads.PLCTYPE_REAL) - 20) < 1e-3
+    assert (tmp_path / "metrics.txt").read_text().count("gears_found 3") == 1
+
+
+def test_missing_metrics_variables_turn_the_plc_export_off(plc_and_handler, tmp_path, capsys):
+    plc, handler = plc_and_handler
+    plc_variables = dict(plc_metric_variables, **{"Main.metrics_nope": ("timeouts", "<i")})
+    exporter, io_worker = make_exporter(plc, tmp_path, plc_variables)
+    for _ in range(3):
+        exporter.export()
+    io_worker.stop()
+    assert exporter.plc is None
+    assert capsys.readouterr().out.count("Warning: the PLC program has no metrics variables") == 1
+    assert handler.read_value("Main.metrics_gears_found", pyads.PLCTYPE_DINT) == 0  # Nothing half-written
+    assert (tmp_path / "metrics.txt").exists()                                  # The file export goes on
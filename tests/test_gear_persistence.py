@@ -0,0 +1,73 @@
+## Tests of the per-part result archive
+import os
+import numpy as np
+import pytest
+from gear_persistence import ResultArchive, load_part
+
+
+## Gear dict like the detection returns it, with `points` contour points
+def make_gear(points=400, diameter_mm=100.0):
+    angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    contour = np.stack([320 + 120 * np.cos(angles), 240 + 120 * np.sin(angles)], axis=1).astype(np.int32).reshape(-1, 1, 2)
+    return {
+        "center": (320.0, 240.0),
+        "radius": 120.5,
+        "depth_m": 0.25,
+        "pixels_per_mm": 2.45,
+        "diameter_mm": diameter_mm,
+        "contour": contour,
+        "distances_mm": np.full(points, diameter_mm / 2),
+        "angles_deg": np.degrees(angles),
+    }
+
+
+def archive_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("part_"))
+
+
+def test_part_round_trip(tmp_path):
+    archive = ResultArchive(str(tmp_path))
+    gear = make_gear()
+    path = archive.add(gear, 1760000000.123, recipe_id=7, rotation_offset_deg=12.5)
+    part = load_part(path)
+    np.testing.assert_array_equal(part["contour"], gear["contour"])
+    np.testing.assert_allclose(part["distances_mm"], gear["distances_mm"], rtol=1e-6)
+    np.testing.assert_allclose(part["angles_deg"], gear["angles_deg"], rtol=1e-6)
+    assert part["center"] == pytest.approx(gear["center"])
+    for key in ("radius", "depth_m", "pixels_per_mm", "diameter_mm"):
+        assert part[key] == pytest.approx(gear[key])
+    assert part["timestamp"] == pytest.approx(1760000000.123)
+    assert part["recipe_id"] == 7
+    assert part["rotation_offset_deg"] == pytest.approx(12.5)
+    assert load_part(archive.add(gear, 1760000001.0))["recipe_id"] == -1        # Full path uploaded
+
+
+def test_oldest_parts_are_removed_by_file_count(tmp_path):
+    archive = ResultArchive(str(tmp_path), max_files=5)
+    paths = [archive.add(make_gear(), 1760000000 + i) for i in range(12)]
+    assert archive_files(tmp_path) == sorted(os.path.basename(path) for path in paths[-5:])
+    assert archive.total_bytes == sum(os.path.getsize(path) for path in paths[-5:])
+
+
+def test_oldest_parts_are_removed_by_size(tmp_path):
+    part_size = os.path.getsize(ResultArchive(str(tmp_path / "probe")).add(make_gear(), 1760000000))
+    archive = ResultArchive(str(tmp_path / "archive"), max_bytes=int(3.5 * part_size))
+    paths = [archive.add(make_gear(), 1760000000 + i) for i in range(10)]
+    assert archive_files(tmp_path / "archive") == sorted(os.path.basename(path) for path in paths[-3:])
+    assert archive.total_bytes <= 3.5 * part_size
+
+
+def test_newest_part_is_kept_even_above_the_size_limit(tmp_path):
+    archive = ResultArchive(str(tmp_path), max_bytes=1)
+    archive.add(make_gear(), 1760000000)
+    path = archive.add(make_gear(), 1760000001)
+    assert archive_files(tmp_path) == [os.path.basename(path)]
+
+
+def test_existing_parts_count_towards_the_limits(tmp_path):
+    archive = ResultArchive(str(tmp_path), max_files=10)
+    old_paths = [archive.add(make_gear(), 1760000000 + i) for i in range(4)]
+    reopened = ResultArchive(str(tmp_path), max_files=5)
+    assert len(reopened.files) == 4
+    new_paths = [reopened.add(make_gear(), 1760000100 + i) for i in range(3)]
+    assert archive_files(tmp_path) == sorted(os.path.basename(path) for path in old_paths[2:] + new_paths)
@@ -0,0 +1,86 @@
+## Tests of the pipeline stages: latest-frame hand-over, detection cycles and the I/O worker
+import threading
+import time
+import pytest
+from gear_detection import default_settings
+from gear_metrics import Metrics
+from gear_pipeline import LatestSlot, DetectionWorker, IoWorker
+from gear_replay import synthetic_gear_frame, ReplayDepthFrame
+
+
+## Detection worker that is stopped after the test
+@pytest.fixture
+def detector():
+    slot = LatestSlot()
+    worker = DetectionWorker(slot, dict(default_settings, detection_mode="full"), Metrics())
+    worker.start()
+    yield worker
+    worker.stop()
+    worker.join(timeout=2)
+
+
+## Function to put a synthetic gear frame (taken now) in the slot of the detection worker
+def put_frame(slot):
+    color_image, depth = synthetic_gear_frame(seed=1)
+    slot.put((time.monotonic(), color_image, ReplayDepthFrame(depth)))
+
+
+def test_slot_only_keeps_the_newest_item():
+    slot = LatestSlot()
+    for item in ("a", "b", "c"):
+        slot.put(item)
+    assert slot.get_newer(0) == (3, "c")                                        # Older items were overwritten
+    assert slot.get_newer(3, timeout=0.05) == (3, None)                         # Nothing newer: timeout
+
+    threading.Timer(0.05, slot.put, ("d",)).start()
+    assert slot.get_newer(3, timeout=2) == (4, "d")                             # Wakes up on the next put
+
+
+def test_gear_of_the_active_cycle_is_returned(detector):
+    detector.start_cycle()
+    put_frame(detector.slot)
+    result = detector.wait_result(5)
+    assert result is not None
+    color_image, gear = result
+    assert gear["diameter_mm"] == pytest.approx(100, abs=2)
+    assert not detector.active                                                  # One result per cycle
+
+
+def test_frames_from_before_the_start_pulse_are_not_used(detector):
+    put_frame(detector.slot)
+    time.sleep(0.01)
+    detector.start_cycle()
+    assert detector.wait_result(0.3) is None
+
+
+def test_cancelled_cycle_gives_no_result(detector):
+    detector.start_cycle()
+    detector.cancel()
+    put_frame(detector.slot)
+    assert detector.wait_result(0.3) is None
+    assert detector.result is None
+
+
+def test_no_gear_times_out(detector):
+    detector.settings["max_diameter_mm"] = 80                                   # Gear bigger than the allowed range
+    detector.start_cycle()
+    put_frame(detector.slot)
+    start = time.monotonic()
+    assert detector.wait_result(0.3) is None
+    assert time.monotonic() - start >= 0.3
+    assert detector.active                                                      # Still searching until the station cancels
+    assert detector.metrics.counters["diameter_out_of_range"] >= 1
+
+
+def test_io_worker_runs_jobs_in_order_and_returns_results():
+    io_worker = IoWorker()
+    io_worker.start()
+    order = []
+    io_worker.submit(time.sleep, 0.05)
+    io_worker.submit(order.append, 1)
+    io_worker.submit(lambda: 1 / 0)                                             # A failing job does not stop the worker
+    assert io_worker.call(lambda: order.append(2) or "done") == "done"
+    assert order == [1, 2]
+    io_worker.stop()
+    io_worker.join(1)
+    assert not io_worker.is_alive()
@@ -0,0 +1,171 @@
+## Tests of the gear profile cache: signature, rotation offset, LRU order and the cache file
+import time
+import numpy as np
+import pytest
+from gear_detection import detect_gear, default_settings
+from gear_profile_cache import GearProfileCache, ProfileCacheSaver, radial_profile, profile_signature, rotation_offset
+from gear_replay import synthetic_gear_frame, ReplayDepthFrame
+
+
+## Radial profile of a gear with flat tooth tops and roots, rotated by `rotation_deg`
+def tooth_profile(teeth, rotation_deg=0.0, points=360):
+    angles = np.radians(np.arange(points) * (360.0 / points) - rotation_deg)
+    return 50 + 2 * (np.clip(2 * np.sin(teeth * angles), -1, 1) + 1) / 2
+
+
+## Gear found by the detection in a synthetic image
+def detected_gear(teeth, rotation_deg, diameter_mm=100, seed=1):
+    color_image, depth = synthetic_gear_frame(teeth=teeth, diameter_mm=diameter_mm, rotation_deg=rotation_deg, seed=seed)
+    message, gear = detect_gear(color_image, ReplayDepthFrame(depth), default_settings)
+    assert gear is not None, message
+    return gear
+
+
+## Whether contour_to_polar shifted the angles of a gear by 180 degrees (first point near 180 degrees)
+def shifted_by_180(gear):
+    x, y = gear["center"]
+    first_x, first_y = gear["contour"][0][0]
+    return bool(170 <= (np.degrees(np.arctan2(first_y - y, first_x - x)) + 90) % 360 <= 190)
+
+
+## Difference of two angles modulo one tooth pitch
+def pitch_error(angle, expected, teeth):
+    pitch = 360.0 / teeth
+    error = (angle - expected) % pitch
+    return min(error, pitch - error)
+
+
+@pytest.mark.parametrize("rotation_deg", [0.0, 0.4, 13.25, 97.6, 271.9])
+def test_rotation_offset_of_a_profile(rotation_deg):
+    offset = rotation_offset(tooth_profile(7, rotation_deg), tooth_profile(7))
+    assert pitch_error(offset, rotation_deg, 7) < 0.05
+
+
+@pytest.mark.parametrize("teeth", [12, 24, 37])
+def test_signature_is_rotation_invariant(teeth):
+    diameter_mm, found_teeth, magnitudes = profile_signature(tooth_profile(teeth), 100.0)
+    _, rotated_teeth, rotated_magnitudes = profile_signature(tooth_profile(teeth, 23.7), 100.0)
+    assert diameter_mm == 100.0
+    assert found_teeth == rotated_teeth == teeth
+    assert np.linalg.norm(rotated_magnitudes - magnitudes) < 0.01 * np.linalg.norm(magnitudes)
+
+
+@pytest.mark.parametrize("teeth", [9, 20, 31])
+@pytest.mark.parametrize("rotation_deg", [3.3, 12.9, 100.0, 201.7])
+def test_known_gear_is_found_with_its_rotation(teeth, rotation_deg):
+    cache = GearProfileCache()
+    reference = detected_gear(teeth, 0.0)
+    recipe_id = cache.add(reference)
+
+    gear = detected_gear(teeth, rotation_deg, seed=2)
+    found_id, offset, _, _ = cache.lookup(gear)
+    assert found_id == recipe_id
+    # The offset is in the angle frame of the path, which contour_to_polar may have turned by 180 degrees
+    expected = rotation_deg + 180 * (shifted_by_180(gear) - shifted_by_180(reference))
+    assert pitch_error(offset, expected, teeth) < 0.3
+
+
+def test_other_gear_types_are_not_found():
+    cache = GearProfileCache()
+    cache.add(detected_gear(24, 0.0))
+    assert cache.lookup(detected_gear(25, 0.0))[0] is None                     # Other tooth count
+    assert cache.lookup(detected_gear(24, 0.0, diameter_mm=110))[0] is None    # Other diameter
+
+
+def test_least_recently_used_type_is_removed():
+    cache = GearProfileCache(max_entries=2)
+    first = cache.add(detected_gear(12, 0.0))
+    second = cache.add(detected_gear(20, 0.0))
+    assert cache.lookup(detected_gear(12, 5.0))[0] == first                    # Hit: first is now the most recently used
+    cache.add(detected_gear(30, 0.0))
+    assert list(cache.entries) == [first, 3]
+    assert second not in cache.entries
+
+
+def test_cache_file_keeps_types_and_lru_order(tmp_path):
+    filename = str(tmp_path / "cache.npz")
+    cache = GearProfileCache(filename=filename)
+    first = cache.add(detected_gear(12, 0.0))
+    second = cache.add(detected_gear(20, 0.0))
+    cache.save()
+    assert not cache.changed
+
+    assert cache.lookup(detected_gear(12, 5.0))[0] == first
+    assert cache.changed                                                        # The hit changed the LRU order
+    cache.save()
+
+    loaded = GearProfileCache(filename=filename)
+    assert list(loaded.entries) == [second, first]
+    assert loaded.next_recipe_id == 3
+    assert loaded.lookup(detected_gear(20, 7.0))[0] == second
+
+
+def test_saver_writes_new_types_at_once_and_the_lru_order_at_stop(tmp_path):
+    filename = str(tmp_path / "cache.npz")
+    cache = GearProfileCache(filename=filename)
+    saver = ProfileCacheSaver(cache, interval=60.0)
+    saver.start()
+    first = cache.add(detected_gear(12, 0.0))
+    second = cache.add(detected_gear(20, 0.0))
+    saver.request_save()
+    for _ in range(100):
+        if not cache.changed:
+            break
+        saver.join(0.02)
+    assert list(GearProfileCache(filename=filename).entries) == [first, second]
+
+    cache.lookup(detected_gear(12, 5.0))
+    saver.stop()
+    saver.join(5)
+    assert list(GearProfileCache(filename=filename).entries) == [second, first]
+
+
+def test_cache_keeps_only_the_profile_not_the_path(tmp_path):
+    cache = GearProfileCache(filename=str(tmp_path / "cache.npz"))
+    cache.add(detected_gear(12, 0.0))
+    cache.save()
+    assert set(next(iter(cache.entries.values()))) == {"diameter_mm", "teeth", "magnitudes", "profile"}
+    with np.load(str(tmp_path / "cache.npz")) as data:
+        assert not [name for name in data.files if name.endswith(("distances_mm", "angles_deg"))]
+
+
+def test_new_plc_symbol_version_clears_the_cache(tmp_path):
+    filename = str(tmp_path / "cache.npz")
+    cache = GearProfileCache(filename=filename)
+    cache.plc_version_changed(4)                                                # First version after the start
+    first = cache.add(detected_gear(12, 0.0))
+    cache.plc_version_changed(4)
+    assert list(cache.entries) == [first]
+    cache.save()
+
+    loaded = GearProfileCache(filename=filename)
+    loaded.plc_version_changed(4)                                               # Same PLC program as before the restart
+    assert list(loaded.entries) == [first]
+    loaded.plc_version_changed(5)                                               # PLC program downloaded again
+    assert len(loaded) == 0
+    assert loaded.add(detected_gear(12, 0.0)) == first + 1                      # Recipe IDs are not reused
+
+    cache.save()
+    restarted = GearProfileCache(filename=filename)
+    restarted.plc_version_changed(6)                                            # Downloaded while the program was not running
+    assert len(restarted) == 0
+
+
+def test_symbol_version_notification_clears_the_cache(plc_and_handler):
+    from twincat_transfer import watch_symbol_version
+
+    plc, handler = plc_and_handler
+    cache = GearProfileCache()
+    notification = watch_symbol_version(plc, {}, cache.plc_version_changed)
+    try:
+        deadline = time.time() + 2
+        while cache.plc_version == -1 and time.time() < deadline:              # Initial value of the symbol version
+            time.sleep(0.01)
+        cache.add(detected_gear(12, 0.0))
+        handler.relocate_symbols()                                              # Simulated download of the PLC program
+        deadline = time.time() + 2
+        while len(cache) and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(cache) == 0
+    finally:
+        plc.del_device_notification(*notification)
@@ -0,0 +1,161 @@
+## Tests of one station (replayed synthetic gears) against its own local fake TwinCAT PLC
+import itertools
+import threading
+import time
+import numpy as np
+import pyads
+import pytest
+from fake_twincat import start_fake_plc, gear_plc_variables, prefixed_variables
+from gear_persistence import load_part
+from gear_station import GearStation
+
+## Variables of the TwinCAT program before the bulk upload, the recipe cache and the metrics export
+legacy_plc_variables = {name: gear_plc_variables[name] for name in
+                        ("Main.startprocess", "Main.restart", "Main.coordinatesreceived", "Main.status_message", "Main.next_move",
+                         "Main.x_coords", "Main.y_coords")}
+final_states = ("Process completed", "Error: coordinates not sent")
+ip_addresses = (f"127.0.0.{n}" for n in itertools.count(20))                    # Own fake PLC per test: a port is not reused too soon
+
+
+## Fresh fake PLC per test; yields a function that starts one and returns (server, handler, station config)
+@pytest.fixture
+def fake_station_plc(tmp_path):
+    servers = []
+
+    def start(variables=gear_plc_variables, **config):
+        ip_address = next(ip_addresses)
+        server, handler = start_fake_plc(ip_address, variables)
+        servers.append(server)
+        config = dict({"name": "test", "replay": "synthetic", "ams_net_id": f"{ip_address}.1.1", "ip_address": ip_address,
+                       "output_directory": str(tmp_path), "metrics_interval_s": 0.5}, **config)
+        return server, handler, config
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+## Station running in a thread against a fresh fake PLC; yields a function to start it with a config
+@pytest.fixture
+def station_factory(fake_station_plc):
+    running = []
+
+    def start(variables=gear_plc_variables, **config):
+        server, handler, config = fake_station_plc(variables, **config)
+        states = []
+        stop_event = threading.Event()
+        station = GearStation(config, lambda status: states.append(status["state"]), stop_event)
+        thread = threading.Thread(target=station.run, daemon=True)
+        thread.start()
+        running.append((stop_event, thread))
+        deadline = time.time() + 20
+        while "started" not in states and thread.is_alive() and time.time() < deadline:
+            time.sleep(0.01)
+        assert "started" in states
+        return station, handler
+
+    yield start
+    for stop_event, thread in running:
+        stop_event.set()
+        thread.join(timeout=10)
+
+
+## Function to give a start pulse and wait until the station has finished its cycle; returns the last status message
+def run_cycle(handler, prefix="Main."):
+    handler.write_value(prefix + "status_message", "", pyads.PLCTYPE_STRING)
+    handler.write_value(prefix + "coordinatesreceived", False, pyads.PLCTYPE_BOOL)  # Reset by the PLC program for the next part
+    handler.write_value(prefix + "startprocess", True, pyads.PLCTYPE_BOOL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        status = handler.read_value(prefix + "status_message", pyads.PLCTYPE_STRING)
+        if status in final_states:
+            time.sleep(0.1)                                                     # Last writes of the cycle
+            return status
+        time.sleep(0.02)
+    return status
+
+
+def test_missing_plc_variables_stop_the_station_at_the_start(fake_station_plc):
+    _, _, config = fake_station_plc(legacy_plc_variables, coordinate_transfer_mode="bulk", profile_cache_enabled=True)
+    with pytest.raises(RuntimeError, match="Main.coord_count, Main.recipe_id, Main.rotation_offset_deg"):
+        GearStation(config).open()
+
+
+def test_legacy_plc_program_works_with_the_defaults(station_factory):
+    station, handler = station_factory(legacy_plc_variables)
+    assert run_cycle(handler) == "Process completed"                            # Per-point upload, no recipes, no PLC metrics
+    assert handler.read_value("Main.coordinatesreceived", pyads.PLCTYPE_BOOL) is True
+    assert handler.read_reals("Main.x_coords", 100).all()
+
+
+def test_failed_upload_does_not_complete_the_process(station_factory):
+    station, handler = station_factory(coordinate_transfer_mode="bulk")
+    with handler.lock:
+        del handler.symbols["Main.coord_count"]                                 # Downloaded PLC program without the variable
+    station.symbol_cache.clear()
+    assert run_cycle(handler) == "Error: coordinates not sent"
+    assert handler.read_value("Main.coordinatesreceived", pyads.PLCTYPE_BOOL) is False
+    assert not handler.read_reals("Main.x_coords", 100).any()
+    assert station.metrics.counters["cycles_failed"] == 1
+
+
+def test_successful_upload_completes_the_process(station_factory):
+    station, handler = station_factory(coordinate_transfer_mode="bulk")
+    assert run_cycle(handler) == "Process completed"
+    assert handler.read_value("Main.coordinatesreceived", pyads.PLCTYPE_BOOL) is True
+    assert handler.read_value("Main.restart", pyads.PLCTYPE_BOOL) is False
+    assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) > 100
+
+
+def test_known_gear_gets_its_recipe_and_a_refused_recipe_sends_the_path(station_factory):
+    station, handler = station_factory(coordinate_transfer_mode="bulk", profile_cache_enabled=True)
+    assert run_cycle(handler) == "Process completed"                            # New gear type: full path + new recipe ID
+    first_recipe = handler.read_value("Main.recipe_id", pyads.PLCTYPE_DINT)
+    assert first_recipe > 0 and len(station.profile_cache) == 1
+
+    handler.write_value("Main.coord_count", 0, pyads.PLCTYPE_INT)
+    assert run_cycle(handler) == "Process completed"                            # Same gear type: only the recipe
+    assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) == 0
+    assert station.metrics.counters["profile_cache_hits"] == 1
+
+    with handler.lock:
+        del handler.symbols["Main.rotation_offset_deg"]                         # The PLC does not take the recipe any more
+    station.symbol_cache.clear()
+    assert run_cycle(handler) == "Process completed"                            # Recipe refused: the full path was sent instead
+    assert handler.read_value("Main.coordinatesreceived", pyads.PLCTYPE_BOOL) is True
+    assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) > 100
+    assert len(station.profile_cache) == 0                                      # No recipe the PLC does not know
+
+
+def test_station_uploads_the_path_of_the_replayed_gear(station_factory):
+    variables = prefixed_variables("Cell2.", legacy_plc_variables)
+    station, handler = station_factory(variables, variable_prefix="Cell2.", start_pulse_mode="polling")
+    assert run_cycle(handler, "Cell2.") == "Process completed"
+    assert handler.read_value("Cell2.coordinatesreceived", pyads.PLCTYPE_BOOL) is True
+    assert handler.read_value("Cell2.restart", pyads.PLCTYPE_BOOL) is False
+    assert handler.read_value("Cell2.startprocess", pyads.PLCTYPE_BOOL) is False  # Start pulse acknowledged
+
+    archive = station.persistence.archive
+    deadline = time.time() + 5
+    while not archive.files and time.time() < deadline:                         # Written by the persistence worker
+        time.sleep(0.02)
+    part = load_part(archive.files[-1][0])
+    points = len(part["distances_mm"])
+    assert points > 100
+    np.testing.assert_array_equal(handler.read_reals("Cell2.x_coords", points), np.float32(part["distances_mm"]))
+    np.testing.assert_array_equal(handler.read_reals("Cell2.y_coords", points), np.float32(part["angles_deg"]))
+    assert not handler.read_reals("Cell2.x_coords", points + 1)[points]         # Nothing written behind the path
+
+
+def test_station_times_out_without_a_gear(station_factory):
+    station, handler = station_factory(timeout_s=1, settings={"max_diameter_mm": 80})  # The replayed gear is too big
+    handler.write_value("Main.startprocess", True, pyads.PLCTYPE_BOOL)
+    deadline = time.time() + 10
+    while station.metrics.counters.get("timeouts", 0) == 0 and time.time() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.1)                                                             # Status write on the I/O worker
+    assert station.metrics.counters["timeouts"] == 1
+    assert handler.read_value("Main.status_message", pyads.PLCTYPE_STRING) == "Timeout occurred. No gear found."
+    assert handler.read_value("Main.coordinatesreceived", pyads.PLCTYPE_BOOL) is False
+    assert not station.detector.active                                          # The search was cancelled
+    assert "gears_found" not in station.metrics.counters
@@ -0,0 +1,53 @@
+## Tests of the multi-station runner: station list and core assignment
+import json
+import os
+import pytest
+from gear_stations import load_stations, assign_cpus
+
+
+## Function to write a station list and load it
+def load(tmp_path, station_list):
+    filename = tmp_path / "stations.json"
+    filename.write_text(json.dumps(station_list))
+    return load_stations(str(filename))
+
+
+def test_station_settings_are_merged_with_the_defaults(tmp_path):
+    stations = load(tmp_path, {
+        "defaults": {"start_pulse_mode": "polling", "timeout_s": 5, "settings": {"lower_threshold": 20, "min_diameter_mm": 40}},
+        "stations": [
+            {"name": "cell1"},
+            {"timeout_s": 8, "settings": {"min_diameter_mm": 60}},
+        ],
+    })
+    assert [config["name"] for config in stations] == ["cell1", "station2"]
+    assert [config["output_directory"] for config in stations] == ["cell1", "station2"]
+    assert stations[0]["settings"] == {"lower_threshold": 20, "min_diameter_mm": 40}
+    assert stations[1]["settings"] == {"lower_threshold": 20, "min_diameter_mm": 60}  # Merged per setting, not replaced
+    assert [config["timeout_s"] for config in stations] == [5, 8]
+    assert all(config["start_pulse_mode"] == "polling" for config in stations)
+
+
+def test_station_names_must_be_unique(tmp_path):
+    with pytest.raises(ValueError):
+        load(tmp_path, {"stations": [{"name": "cell"}, {"name": "cell"}]})
+
+
+def test_example_station_list_can_be_loaded():
+    filename = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stations.example.json")
+    stations = load_stations(filename)
+    assert [config["cpus"] for config in stations] == [[1], [2]]
+    assert stations[1]["settings"]["lower_threshold"] == 30
+    assert stations[1]["settings"]["upper_threshold"] == 150
+
+
+def test_stations_without_cpus_get_free_cores(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    stations = assign_cpus([{"name": "a"}, {"name": "b", "cpus": [1]}, {"name": "c"}, {"name": "d"}, {"name": "e"}])
+    assert [config["cpus"] for config in stations] == [[0], [1], [2], [3], [0]]  # Round robin over the cores that are not taken
+
+
+def test_explicit_cpus_are_kept(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1}, raising=False)
+    stations = assign_cpus([{"name": "a", "cpus": [0, 1]}, {"name": "b", "cpus": [1]}, {"name": "c"}])
+    assert [config["cpus"] for config in stations] == [[0, 1], [1], [0]]  # All cores taken: shared with the others
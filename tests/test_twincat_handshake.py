@@ -0,0 +1,97 @@
+## Tests of the start pulse handshake against the local fake TwinCAT PLC
+import threading
+import time
+import pyads
+import pytest
+import twincat_handshake
+from gear_pipeline import IoWorker
+from twincat_handshake import PlcHandshake
+
+
+## Handshake that is closed again after the test
+@pytest.fixture
+def handshake_factory(plc_and_handler):
+    plc, handler = plc_and_handler
+    handshakes = []
+
+    def make(*args, **kwargs):
+        handshake = PlcHandshake(plc, *args, **kwargs)
+        handshake.open()
+        handshakes.append(handshake)
+        return handshake
+    yield make
+    for handshake in handshakes:
+        handshake.close()
+
+
+def give_start_pulse(handler):
+    handler.write_value("Main.startprocess", True, pyads.PLCTYPE_BOOL)
+
+
+def test_notification_sets_the_start_event(plc_and_handler, handshake_factory):
+    _, handler = plc_and_handler
+    handshake = handshake_factory("notification")
+    assert handshake.mode == "notification"
+    assert not handshake.wait_for_start(timeout=0.2)
+
+    give_start_pulse(handler)
+    assert handshake.wait_for_start(timeout=2)
+    assert handshake.start_event.is_set()
+    assert handshake.start_requested()
+
+
+def test_acknowledge_clears_the_event_and_resets_the_pulse(plc_and_handler, handshake_factory):
+    _, handler = plc_and_handler
+    handshake = handshake_factory("notification")
+    give_start_pulse(handler)
+    assert handshake.wait_for_start(timeout=2)
+
+    handshake.acknowledge_start()
+    assert not handshake.start_event.is_set()
+    assert handler.read_value("Main.startprocess", pyads.PLCTYPE_BOOL) is False
+    time.sleep(0.1)                                                             # The falling edge must not set the event again
+    assert not handshake.start_requested()
+
+
+def test_failed_subscription_falls_back_to_polling(plc_and_handler, handshake_factory):
+    plc, handler = plc_and_handler
+    handler.notifications_enabled = False                                       # The fake PLC refuses the subscription
+    handshake = handshake_factory("notification", poll_interval=0.01)
+    assert handshake.mode == "polling"
+    assert not handshake.start_requested()
+
+    give_start_pulse(handler)
+    assert handshake.wait_for_start(timeout=2)
+    handshake.acknowledge_start()
+    assert not handshake.start_requested()
+
+
+def test_polling_runs_on_the_io_worker(plc_and_handler, handshake_factory, monkeypatch):
+    _, handler = plc_and_handler
+    poll_threads = set()
+    check_start_pulse = twincat_handshake.check_start_pulse
+
+    def recording_check_start_pulse(*args):
+        poll_threads.add(threading.current_thread())
+        return check_start_pulse(*args)
+    monkeypatch.setattr(twincat_handshake, "check_start_pulse", recording_check_start_pulse)
+    io_worker = IoWorker()
+    io_worker.start()
+    try:
+        handshake = handshake_factory("polling", poll_interval=0.01, io_worker=io_worker)
+        give_start_pulse(handler)
+        assert handshake.wait_for_start(timeout=2)
+        assert poll_threads == {io_worker}                                      # Never on the waiting thread
+    finally:
+        io_worker.stop()
+
+
+def test_wait_for_start_stops_and_gives_heartbeats(plc_and_handler, handshake_factory):
+    handshake = handshake_factory("notification")
+    stop_event = threading.Event()
+    heartbeats = []
+    threading.Timer(0.35, stop_event.set).start()
+    start = time.time()
+    assert not handshake.wait_for_start(stop_event=stop_event, heartbeat=lambda: heartbeats.append(time.time()), heartbeat_interval=0.1)
+    assert time.time() - start < 1.5
+    assert len(heartbeats) >= 1
@@ -0,0 +1,117 @@
+## Tests of the coordinate upload against the local fake TwinCAT PLC
+import math
+import time
+import numpy as np
+import pyads
+import pytest
+from fake_twincat import fake_ams_net_id, fake_ip_address, fake_port
+from twincat_transfer import (send_coordinates_to_twincat, send_coordinates_to_twincat_bulk, max_points, max_sum_command_bytes,
+                              real_size, watch_symbol_version)
+
+
+## Gear-like radial profile with `points` samples
+def gear_profile(points):
+    angles = np.linspace(0, 360, points, endpoint=False)
+    distances = 60 + 5 * np.sin(np.radians(angles) * 24)
+    return distances.tolist(), angles.tolist()
+
+
+@pytest.mark.parametrize("points", [1, 500, 2000, 9999])
+def test_bulk_upload_writes_coordinates_and_count(plc_and_handler, points):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(points)
+    assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache={})
+    np.testing.assert_array_equal(handler.read_reals("Main.x_coords", points), np.float32(x_coords))
+    np.testing.assert_array_equal(handler.read_reals("Main.y_coords", points), np.float32(y_coords))
+    assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) == points
+
+
+@pytest.mark.parametrize("points", [100, 2000, 9999, 12000])
+def test_bulk_upload_round_trips_are_bounded(plc_and_handler, points):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(points)
+    symbol_cache = {}
+    send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)   # First upload looks up the three symbols
+    assert len(symbol_cache) == 3
+
+    handler.reset_counters()
+    assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)
+    count = min(points, max_points)
+    payload_bytes = 2 * count * real_size + 2
+    assert handler.request_count <= math.ceil(payload_bytes / max_sum_command_bytes) + 1
+    assert handler.request_count < 10
+
+
+def test_bulk_upload_is_clipped_to_the_plc_arrays(plc_and_handler):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(12000)
+    assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache={})
+    assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) == max_points
+    np.testing.assert_array_equal(handler.read_reals("Main.x_coords", max_points), np.float32(x_coords[:max_points]))
+    np.testing.assert_array_equal(handler.read_reals("Main.y_coords", max_points), np.float32(y_coords[:max_points]))
+
+
+def test_per_point_upload(plc_and_handler):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(50)
+    assert send_coordinates_to_twincat(x_coords, y_coords, fake_ams_net_id, fake_port, ip_address=fake_ip_address)
+    np.testing.assert_array_equal(handler.read_reals("Main.x_coords", 50), np.float32(x_coords))
+    np.testing.assert_array_equal(handler.read_reals("Main.y_coords", 50), np.float32(y_coords))
+    assert handler.request_count >= 2 * 50                                      # One write per value
+
+
+def test_missing_symbol_is_reported_and_the_connection_keeps_working(plc_and_handler):
+    plc, handler = plc_and_handler
+    with pytest.raises(pyads.ADSError) as error:
+        plc.get_symbol("Main.nope")
+    assert error.value.err_code == 1808                                         # ADSERR_DEVICE_SYMBOLNOTFOUND, not a timeout
+    with pytest.raises(pyads.ADSError) as error:
+        plc.read_by_name("Main.nope", pyads.PLCTYPE_INT)
+    assert error.value.err_code == 1808
+    handler.write_value("Main.coord_count", 42, pyads.PLCTYPE_INT)
+    assert plc.read_by_name("Main.coord_count", pyads.PLCTYPE_INT) == 42
+
+
+def test_upload_to_a_missing_variable_fails(plc_and_handler):
+    plc, _ = plc_and_handler
+    x_coords, y_coords = gear_profile(100)
+    start = time.time()
+    assert not send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, {}, count_variable="Main.nope")
+    assert time.time() - start < 1                                              # Error reply, no ADS timeout
+    assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, {})
+
+
+def test_failed_upload_clears_the_symbol_cache(plc_and_handler):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(100)
+    symbol_cache = {"Main.x_coords": (pyads.constants.ADSIGRP_SYM_VALBYHND, 12345)}  # Stale location, rejected by the PLC
+    assert not send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)
+    assert symbol_cache == {}
+    assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)
+    np.testing.assert_array_equal(handler.read_reals("Main.x_coords", 100), np.float32(x_coords))
+
+
+def test_symbol_version_change_clears_the_symbol_cache(plc_and_handler):
+    plc, handler = plc_and_handler
+    x_coords, y_coords = gear_profile(100)
+    symbol_cache = {}
+    notification = watch_symbol_version(plc, symbol_cache)
+    assert notification is not None
+    try:
+        time.sleep(0.1)                                                         # Initial value of the symbol version
+        assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)
+        old_location = symbol_cache["Main.x_coords"]
+
+        handler.relocate_symbols()                                              # Simulated download: all variables move
+        deadline = time.time() + 2
+        while symbol_cache and time.time() < deadline:
+            time.sleep(0.01)
+        assert symbol_cache == {}
+
+        x_coords, y_coords = gear_profile(200)
+        assert send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache)
+        assert symbol_cache["Main.x_coords"] != old_location
+        np.testing.assert_array_equal(handler.read_reals("Main.x_coords", 200), np.float32(x_coords))
+        assert handler.read_value("Main.coord_count", pyads.PLCTYPE_INT) == 200
+    finally:
+        plc.del_device_notification(*notification)
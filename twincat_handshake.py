@@ -0,0 +1,155 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: START/RESTART HANDSHAKE WITH TWINCAT (POLLING OR ADS DEVICE NOTIFICATIONS)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import ctypes                   # Size of the PLC data types
+import threading                # Thread-safe start event
+import time                     # Time module
+import pyads                    # Library for communication with the TwinCAT PLC
+
+
+## Function to check the start pulse from TwinCAT
+def check_start_pulse(plc, variable_name="Main.startprocess"):
+    try:
+        if plc.is_open:                                                         # Check if the PLC connection is open
+            return plc.read_by_name(variable_name, pyads.PLCTYPE_BOOL)          # Read the start signal
+        else:
+            print("PLC connection is not open.")
+            return False
+    except Exception as e:
+        print(f"Error while reading the start pulse: {e}")
+        return False
+
+
+## Function to reset the start pulse in TwinCAT
+def reset_start_pulse(plc, variable_name="Main.startprocess"):
+    try:
+        if plc.is_open:                                                         # Check if the PLC connection is open
+            plc.write_by_name(variable_name, False, pyads.PLCTYPE_BOOL)         # Set to the start signal to False
+        else:
+            print("PLC connection is not open.")
+    except Exception as e:
+        print(f"Error while resetting the start pulse: {e}")
+
+
+## Function to set the restart variable to True in TwinCAT
+def set_restart_variable_true(plc, variable_name="Main.restart", value=True):
+    try:
+        if plc.is_open:                                                         # Check if the PLC connection is open
+            plc.write_by_name(variable_name, value, pyads.PLCTYPE_BOOL)         # Set restart to True
+        else:
+            print("PLC connection is not open.")
+    except Exception as e:
+        print(f"Error setting restart variable: {e}")
+
+
+## Function to set the restart variable to False in TwinCAT
+def set_restart_variable_false(plc, variable_name="Main.restart", value=False):
+    try:
+        if plc.is_open:                                                         # Check if the PLC connection is open
+            plc.write_by_name(variable_name, value, pyads.PLCTYPE_BOOL)         # Set restart to False
+        else:
+            print("PLC connection is not open.")
+    except Exception as e:
+        print(f"Error setting restart variable: {e}")
+
+
+## Function to set process completed to True in TwinCAT
+def set_process_completed_true(plc, variable_name="Main.coordinatesreceived", value=True):
+    try:
+        if plc.is_open:                                                         # Check if the PLC connection is open
+            plc.write_by_name(variable_name, value, pyads.PLCTYPE_BOOL)         # Set restart to True
+        else:
+            print("PLC connection is not open.")
+    except Exception as e:
+        print(f"Error setting restart variable: {e}")
+
+
+## Handshake with the PLC: start pulse (polled or pushed by an ADS device notification), restart and completed flags
+class PlcHandshake:
+    def __init__(self, plc, mode="notification", start_variable="Main.startprocess", restart_variable="Main.restart",
+                 completed_variable="Main.coordinatesreceived", poll_interval=0.1, io_worker=None):
+        self.plc = plc
+        self.mode = mode                                                        # "notification" or "polling"
+        self.start_variable = start_variable
+        self.restart_variable = restart_variable
+        self.completed_variable = completed_variable
+        self.poll_interval = poll_interval                                      # Time between reads of the start pulse in polling mode
+        self.io_worker = io_worker                                              # ADS calls on one connection must not overlap: polls run on this worker
+        self.start_event = threading.Event()                                    # Set by the notification callback on a rising start pulse
+        self.notification_handles = None
+
+    ## Function to subscribe to the start pulse (falls back to polling if the subscription fails)
+    def open(self):
+        if self.mode != "notification":
+            return
+        try:
+            attrib = pyads.NotificationAttrib(ctypes.sizeof(pyads.PLCTYPE_BOOL), pyads.ADSTRANS_SERVERONCHA)
+            self.notification_handles = self.plc.add_device_notification(self.start_variable, attrib, self.on_start_notification)
+            print(f"Subscribed to {self.start_variable} notifications.")
+        except Exception as e:
+            print(f"Error while subscribing to the start pulse, falling back to polling: {e}")
+            self.mode = "polling"
+
+    ## Function to remove the notification again
+    def close(self):
+        try:
+            if self.notification_handles and self.plc.is_open:
+                self.plc.del_device_notification(*self.notification_handles)
+        except Exception as e:
+            print(f"Error while removing the start pulse notification: {e}")
+        self.notification_handles = None
+
+    ## Callback of the ADS router thread: only sets the event, no ADS calls are allowed here
+    def on_start_notification(self, notification, data_name):
+        _, _, value = self.plc.parse_notification(notification, pyads.PLCTYPE_BOOL)
+        if value:
+            self.start_event.set()
+
+    ## Function to check (without waiting) whether a start pulse was given
+    def start_requested(self):
+        if self.mode == "notification":
+            return self.start_event.is_set()
+        if self.io_worker is not None:
+            return self.io_worker.call(check_start_pulse, self.plc, self.start_variable)
+        return check_start_pulse(self.plc, self.start_variable)
+
+    ## Function to wait for a start pulse; returns False when the timeout expires or `stop_event` is set first
+    ## `heartbeat` is optional: called every `heartbeat_interval` seconds while waiting (e.g. a status report for a supervisor)
+    def wait_for_start(self, timeout=None, stop_event=None, heartbeat=None, heartbeat_interval=1.0):
+        deadline = None if timeout is None else time.time() + timeout
+        next_heartbeat = time.time() + heartbeat_interval
+        while not self.start_requested():
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                return False
+            if stop_event is not None and stop_event.is_set():
+                return False
+            if heartbeat is not None and now >= next_heartbeat:
+                heartbeat()
+                next_heartbeat = now + heartbeat_interval
+            if self.mode == "notification":
+                wait_time = 0.5 if heartbeat is None else min(0.5, max(0.0, next_heartbeat - now))
+                self.start_event.wait(wait_time)                                # Wakes up immediately on a notification
+            else:
+                time.sleep(self.poll_interval)                                  # Check for the start every poll interval
+        return True
+
+    ## Function to confirm a start pulse: clear the event and reset the pulse in the PLC
+    def acknowledge_start(self):
+        self.start_event.clear()
+        reset_start_pulse(self.plc, self.start_variable)
+
+    ## Function to set the restart variable in the PLC
+    def set_restart(self, value):
+        if value:
+            set_restart_variable_true(self.plc, self.restart_variable, True)
+        else:
+            set_restart_variable_false(self.plc, self.restart_variable, False)
+
+    ## Function to tell the PLC that the coordinates were received
+    def set_process_completed(self):
+        set_process_completed_true(self.plc, self.completed_variable, True)
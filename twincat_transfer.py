@@ -0,0 +1,184 @@
+## MINOR INDUSTRIAL AUTOMATION
+## POST PROCESSING SYSTEM
+## DESCRIPTION: TRANSFER OF CONTOUR COORDINATES TO TWINCAT (PER POINT OR BULK OVER ONE PERSISTENT ADS CONNECTION)
+## DATE: 18-10-2026
+## VERSION 1.0
+
+## Libraries
+import ctypes                   # Size of the symbol version
+import struct                   # Packing the ADS sum command header
+import numpy as np              # For numerical operations
+import pyads                    # Library for communication with the TwinCAT PLC
+
+## Parameters
+max_points = 9999               # Size of the coordinate arrays in the PLC (ARRAY[1..9999] OF REAL)
+max_sum_command_bytes = 16384   # Maximum payload of one ADS sum command, larger transfers are split in chunks
+real_size = 4                   # Size of a REAL in bytes
+
+
+## Function to send the coordinates to TwinCAT
+## `metrics` is optional (gear_metrics.Metrics): time of the connect and of every point write, and failed uploads
+## `ip_address` is optional: IP address of the PLC, None = use the ADS route of the AMS Net ID
+def send_coordinates_to_twincat(x_coords, y_coords, plc_address="39.231.85.117.1.1", port=851, metrics=None,
+                                x_variable="Main.x_coords", y_variable="Main.y_coords", ip_address=None):
+    sent = False
+    try:
+        start = metrics.start() if metrics is not None else None
+        plc = pyads.Connection(plc_address, port, ip_address)                   # Creating a PLC connection
+        plc.open()                                                              # Open the connection to the PLC
+        if metrics is not None:
+            metrics.record("upload.connect", start)
+        if plc.is_open:                                                         # Check if the connection is successfully opened
+            print(f"Connected to PLC at {plc_address} on port {port}")
+            for i, (x, angle) in enumerate(zip(x_coords, y_coords)):            # Iterate through X and Y coordinates.
+                if i < 9999:  
+                    start = metrics.start() if metrics is not None else None
+                    plc.write_by_name(f'{x_variable}[{i + 1}]', x, pyads.PLCTYPE_REAL)          # Send X coordinate
+                    plc.write_by_name(f'{y_variable}[{i + 1}]', angle, pyads.PLCTYPE_REAL)      # Send angle
+                    if metrics is not None:
+                        metrics.record("upload.point_write", start)
+            print("Coordinates successfully sent to PLC.")
+            sent = True
+        else:
+            print("Failed to open connection to PLC.")
+            if metrics is not None:
+                metrics.count("upload_errors")
+        plc.close()                                                             # Close the connection to the PLC
+    except Exception as e:
+        print(f"Error: {e}")
+        if metrics is not None:
+            metrics.count("upload_errors")
+    return sent
+
+
+## Function to get the index group and offset of a PLC variable (cached until the symbols change, see watch_symbol_version)
+def get_symbol_location(plc, variable_name, symbol_cache=None):
+    location = symbol_cache.get(variable_name) if symbol_cache is not None else None
+    if location is not None:
+        return location
+    symbol = plc.get_symbol(variable_name)                                      # One ADS round trip to look up the symbol
+    location = (symbol.index_group, symbol.index_offset)
+    if symbol_cache is not None:
+        symbol_cache[variable_name] = location
+    return location
+
+
+## Function to forget all cached symbol locations; the next write looks them up again
+def clear_symbol_cache(symbol_cache):
+    if symbol_cache:
+        symbol_cache.clear()
+        print("Symbol locations cleared, they are looked up again on the next write.")
+
+
+## Function to clear the symbol cache when the symbol version of the PLC changes (online change or download)
+## `on_version` is optional: called with every symbol version, the first one included (e.g. GearProfileCache.plc_version_changed)
+## Returns the notification handles for del_device_notification, or None when the PLC does not support the notification
+def watch_symbol_version(plc, symbol_cache, on_version=None):
+    versions = []                                                               # Last symbol version seen
+
+    # Callback of the ADS router thread: no ADS calls are allowed here
+    def on_symbol_version(notification, data_name):
+        _, _, version = plc.parse_notification(notification, pyads.PLCTYPE_BYTE)
+        if versions and versions[-1] != version:
+            print(f"Symbol version of the PLC changed from {versions[-1]} to {version}.")
+            clear_symbol_cache(symbol_cache)
+        versions[:] = [version]
+        if on_version is not None:
+            on_version(version)
+
+    try:
+        attrib = pyads.NotificationAttrib(ctypes.sizeof(pyads.PLCTYPE_BYTE), pyads.ADSTRANS_SERVERONCHA)
+        return plc.add_device_notification((pyads.constants.ADSIGRP_SYM_VERSION, 0), attrib, on_symbol_version)
+    except Exception as e:
+        print(f"Error while watching the symbol version, symbol locations are only cleared after errors: {e}")
+        return None
+
+
+## Function to split the coordinate arrays and the point count into sum command requests
+def build_sum_write_requests(x_location, y_location, count_location, x_coords, y_coords, count, chunk_points):
+    x_block = np.asarray(x_coords[:count], dtype="<f4").tobytes()              # Pack all X values as one REAL block
+    y_block = np.asarray(y_coords[:count], dtype="<f4").tobytes()              # Pack all Y values as one REAL block
+    chunk_bytes = chunk_points * real_size
+
+    requests = []
+    for (index_group, index_offset), block in ((x_location, x_block), (y_location, y_block)):
+        for start in range(0, len(block), chunk_bytes):
+            requests.append((index_group, index_offset + start, block[start:start + chunk_bytes]))
+
+    # The point count goes last, so the PLC only sees the new count after the coordinates are written
+    requests.append((count_location[0], count_location[1], struct.pack("<h", count)))
+    return requests
+
+
+## Function to send a list of (index group, index offset, data) writes as few ADS sum commands as possible
+def send_sum_write(plc, requests, max_bytes=max_sum_command_bytes, metrics=None):
+    round_trips = 0
+    batch = []
+    batch_bytes = 0
+    for request in requests + [None]:                                           # None flushes the last batch
+        if request is not None and (not batch or batch_bytes + len(request[2]) <= max_bytes):
+            batch.append(request)
+            batch_bytes += len(request[2])
+            continue
+
+        header = b"".join(struct.pack("<III", group, offset, len(data)) for group, offset, data in batch)
+        payload = bytearray(header + b"".join(data for _, _, data in batch))
+        start = metrics.start() if metrics is not None else None
+        response = plc.read_write(pyads.constants.ADSIGRP_SUMUP_WRITE, len(batch), None, payload, None, check_length=False)
+        if metrics is not None:
+            metrics.record("upload.sum_command", start)
+        round_trips += 1
+        errors = [code for (code,) in struct.iter_unpack("<I", bytes(response)) if code]
+        if errors:
+            raise pyads.ADSError(errors[0])
+
+        if request is not None:
+            batch = [request]
+            batch_bytes = len(request[2])
+    return round_trips
+
+
+## Function to send the coordinates to TwinCAT as packed REAL blocks over an already open connection
+def send_coordinates_to_twincat_bulk(x_coords, y_coords, plc, symbol_cache=None,
+                                     x_variable="Main.x_coords", y_variable="Main.y_coords",
+                                     count_variable="Main.coord_count", max_bytes=max_sum_command_bytes, metrics=None):
+    try:
+        if plc and plc.is_open:                                                 # Check if the PLC connection is open
+            count = min(len(x_coords), len(y_coords), max_points)               # Number of valid entries for the PLC
+            x_location = get_symbol_location(plc, x_variable, symbol_cache)
+            y_location = get_symbol_location(plc, y_variable, symbol_cache)
+            count_location = get_symbol_location(plc, count_variable, symbol_cache)
+
+            chunk_points = max(1, (max_bytes // 2) // real_size)                # X and Y chunk of the same length fit in one sum command
+            requests = build_sum_write_requests(x_location, y_location, count_location, x_coords, y_coords, count, chunk_points)
+            round_trips = send_sum_write(plc, requests, max_bytes, metrics)
+            print(f"{count} coordinates sent to PLC in {round_trips} sum command(s).")
+            return True
+        else:
+            print("Unable to connect to the PLC.")
+    except Exception as e:
+        print(f"Error while sending coordinates: {e}")
+        clear_symbol_cache(symbol_cache)                                        # A variable may have moved (online change or download)
+    if metrics is not None:
+        metrics.count("upload_errors")
+    return False
+
+
+## Function to send the recipe ID of a known gear type and its rotation offset in one sum command
+def send_recipe_to_twincat(recipe_id, rotation_offset_deg, plc, symbol_cache=None,
+                           recipe_variable="Main.recipe_id", offset_variable="Main.rotation_offset_deg"):
+    try:
+        if plc and plc.is_open:                                                 # Check if the PLC connection is open
+            offset_location = get_symbol_location(plc, offset_variable, symbol_cache)
+            recipe_location = get_symbol_location(plc, recipe_variable, symbol_cache)
+            # The recipe ID goes last, so the PLC only sees the new ID together with its offset
+            send_sum_write(plc, [(offset_location[0], offset_location[1], struct.pack("<f", rotation_offset_deg)),
+                                 (recipe_location[0], recipe_location[1], struct.pack("<i", recipe_id))])
+            print(f"Recipe {recipe_id} with rotation offset {rotation_offset_deg:.2f} degrees sent to PLC.")
+            return True
+        else:
+            print("Unable to connect to the PLC.")
+    except Exception as e:
+        print(f"Error while sending the recipe: {e}")
+        clear_symbol_cache(symbol_cache)                                        # A variable may have moved (online change or download)
+    return False